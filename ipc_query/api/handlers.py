@@ -512,15 +512,15 @@ class ApiHandlers:
             raise NotFoundError(f"Scan job not found: {job_id}")
         return HTTPStatus.OK, _json_bytes(job), "application/json; charset=utf-8"
 
-    def handle_import_job(self, job_id: str) -> tuple[int, bytes, str]:
+    def handle_import_job(self, job_id: str, wait_s: float = 0.0) -> tuple[int, bytes, str]:
         """
         处理单个导入任务查询
 
-        GET /api/import/{job_id}
+        GET /api/import/{job_id}?wait={seconds}
         """
         if self._import is None:
             raise ValidationError("Import service is not enabled")
-        job = self._import.get_job(job_id)
+        job = self._import.get_job(job_id, wait_s=wait_s)
         if not job:
             raise NotFoundError(f"Import job not found: {job_id}")
         return HTTPStatus.OK, _json_bytes(job), "application/json; charset=utf-8"
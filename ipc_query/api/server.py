@@ -38,6 +38,8 @@ _LEGACY_FOLDER_ROUTES = {
     "/api/docs/folder/delete": "/api/folders/delete",
 }
 _LEGACY_SUNSET_DATE = "2026-06-30"
+# GET /api/import/{job_id}?wait= 的阻塞上限（秒），避免长期占用处理线程
+_IMPORT_JOB_MAX_WAIT_S = 30
 
 
 def _json_bytes(obj: Any) -> bytes:
@@ -299,7 +301,14 @@ class RequestHandler(BaseHTTPRequestHandler):
                 job_id = path[len("/api/import/") :]
                 if not job_id:
                     raise NotFoundError("Missing import job id")
-                status, job_body, ct = self._handlers().handle_import_job(job_id)
+                # wait=秒数：任务未结束时最多阻塞等待，省去客户端的短轮询
+                qs = parse_qs(query_string) if query_string else {}
+                wait_raw = (qs.get("wait") or ["0"])[0]
+                try:
+                    wait_s = max(0, min(_IMPORT_JOB_MAX_WAIT_S, int(wait_raw)))
+                except Exception:
+                    wait_s = 0
+                status, job_body, ct = self._handlers().handle_import_job(job_id, wait_s=wait_s)
                 self._send(status, job_body, ct)
 
             elif path.startswith("/api/scan/"):
@@ -593,34 +602,47 @@ class Server:
         self._scan_reason = str(scan_reason or "")
         self._path_policy_warning_count = max(0, int(path_policy_warning_count))
         self._server: ThreadingHTTPServer | None = None
+        self._api_handlers: ApiHandlers | None = None
+        # 监听套接字绑定完成（或失败）后置位，供调用方等待而不必轮询 _server
+        self._ready = threading.Event()
+
+    def _handlers(self) -> ApiHandlers:
+        """构建并缓存 API 处理器；start() 与进程内测试客户端共用同一实例"""
+        if self._api_handlers is None:
+            # 创建文档仓库
+            doc_repo = DocumentRepository(self._db)
+
+            self._api_handlers = ApiHandlers(
+                search_service=self._search,
+                render_service=self._render,
+                doc_repo=doc_repo,
+                db=self._db,
+                config=self._config,
+                import_service=self._import,
+                scan_service=self._scan,
+                import_enabled=self._import_enabled,
+                scan_enabled=self._scan_enabled,
+                import_reason=self._import_reason,
+                scan_reason=self._scan_reason,
+                path_policy_warning_count=self._path_policy_warning_count,
+            )
+        return self._api_handlers
 
     def start(self) -> None:
         """启动服务器"""
-        # 创建文档仓库
-        doc_repo = DocumentRepository(self._db)
-
-        api_handlers = ApiHandlers(
-            search_service=self._search,
-            render_service=self._render,
-            doc_repo=doc_repo,
-            db=self._db,
-            config=self._config,
-            import_service=self._import,
-            scan_service=self._scan,
-            import_enabled=self._import_enabled,
-            scan_enabled=self._scan_enabled,
-            import_reason=self._import_reason,
-            scan_reason=self._scan_reason,
-            path_policy_warning_count=self._path_policy_warning_count,
-        )
+        api_handlers = self._handlers()
 
         # 创建服务器
-        self._server = ThreadingHTTPServer(
-            (self._config.host, self._config.port),
-            RequestHandler,
-        )
-        setattr(self._server, "ipc_query_config", self._config)
-        setattr(self._server, "ipc_query_handlers", api_handlers)
+        try:
+            self._server = ThreadingHTTPServer(
+                (self._config.host, self._config.port),
+                RequestHandler,
+            )
+            setattr(self._server, "ipc_query_config", self._config)
+            setattr(self._server, "ipc_query_handlers", api_handlers)
+        finally:
+            # 绑定失败时同样置位：等待方据 _server 是否为 None 判断结果，不必等满超时
+            self._ready.set()
         server_address = self._server.server_address
         if isinstance(server_address, tuple):
             host = _display_host(server_address[0])
@@ -145,6 +145,9 @@ class Config:
     default_page_size: int = 20
     max_page_size: int = 100
 
+    # 本实例已确认存在的目录（不参与构造与比较），重复调用 ensure_directories 时不再 mkdir
+    _dirs_ensured: set[Path] = field(default_factory=set, init=False, repr=False, compare=False)
+
     @classmethod
     def from_env(cls) -> "Config":
         """从环境变量加载配置"""
@@ -218,11 +221,12 @@ class Config:
         return config
 
     def ensure_directories(self) -> None:
-        """确保必要的目录存在"""
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.upload_dir.mkdir(parents=True, exist_ok=True)
-        if self.pdf_dir:
-            self.pdf_dir.mkdir(parents=True, exist_ok=True)
+        """确保必要的目录存在；同一实例内已创建过的目录直接跳过"""
+        for path in (self.cache_dir, self.upload_dir, self.pdf_dir):
+            if path is None or path in self._dirs_ensured:
+                continue
+            path.mkdir(parents=True, exist_ok=True)
+            self._dirs_ensured.add(path)
 
     def to_dict(self) -> dict[str, Any]:
         """转换为字典（用于日志和调试）"""
@@ -95,6 +95,8 @@ class ImportService:
         self._jobs: dict[str, ImportJob] = {}
         self._job_order: list[str] = []
         self._lock = threading.Lock()
+        # 与 _lock 共用同一把锁：任务进入终态时唤醒 get_job(wait_s=...) 的等待者
+        self._job_finished = threading.Condition(self._lock)
         self._queue: queue.Queue[str] = queue.Queue(maxsize=max(1, int(queue_size)))
         self._stop_event = threading.Event()
         self._worker = threading.Thread(target=self._run_worker, name="ipc-import-worker", daemon=True)
@@ -140,6 +142,7 @@ class ImportService:
                 self._jobs[job_id].error = "import queue is full"
                 self._jobs[job_id].finished_at = time.time()
                 self._prune_jobs_locked()
+                self._job_finished.notify_all()
             self._safe_unlink(staged_path)
             metrics.counter_increment("import_queue_rejected_total")
             metrics.gauge_set("import_queue_depth", float(queue_depth))
@@ -172,10 +175,15 @@ class ImportService:
         payload_out["queue_capacity"] = queue_capacity
         return payload_out
 
-    def get_job(self, job_id: str) -> dict[str, Any] | None:
-        """获取任务状态"""
+    def get_job(self, job_id: str, wait_s: float = 0.0) -> dict[str, Any] | None:
+        """获取任务状态；wait_s > 0 时最多等待该秒数，直到任务成功或失败"""
         with self._lock:
             job = self._jobs.get(job_id)
+            if job is not None and wait_s > 0:
+                self._job_finished.wait_for(
+                    lambda: job.status in {"success", "failed"} or self._stop_event.is_set(),
+                    timeout=wait_s,
+                )
             return job.to_dict() if job else None
 
     def list_jobs(self, limit: int = 20) -> list[dict[str, Any]]:
@@ -188,6 +196,8 @@ class ImportService:
     def stop(self, timeout_s: float = 2.0) -> None:
         """停止后台worker"""
         self._stop_event.set()
+        with self._lock:
+            self._job_finished.notify_all()
         try:
             self._queue.put_nowait("__stop__")
         except queue.Full:
@@ -278,6 +288,7 @@ class ImportService:
                 }
                 job.finished_at = time.time()
                 self._prune_jobs_locked()
+                self._job_finished.notify_all()
 
             if elapsed > self._job_timeout_s:
                 logger.warning(
@@ -304,6 +315,7 @@ class ImportService:
                 job.error = str(e)
                 job.finished_at = time.time()
                 self._prune_jobs_locked()
+                self._job_finished.notify_all()
             self._safe_unlink(job.path)
             if final_promoted:
                 self._safe_unlink(final_path)
@@ -9,8 +9,34 @@ from __future__ import annotations
 import json
 import logging
 import sys
+import time
+from contextvars import ContextVar, Token
 from datetime import datetime, timezone
-from typing import Any, MutableMapping, cast
+from typing import Any, Callable, MutableMapping, cast
+
+try:  # 可选依赖：orjson 编码小字典比标准库快数倍
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None  # type: ignore[assignment]
+
+
+def _stdlib_dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _orjson_dumps(obj: Any) -> str:
+    try:
+        return cast(str, orjson.dumps(obj).decode("utf-8"))
+    except TypeError:
+        # orjson 不支持的类型（非 str 键、超大整数等）回退到标准库
+        return _stdlib_dumps(obj)
+
+
+_dumps: Callable[[Any], str] = _orjson_dumps if orjson is not None else _stdlib_dumps
+
+# 当前上下文中各适配器的附加日志字段（线程/协程隔离，由 LogContext 压栈/还原）。
+# 按适配器对象区分：LogContext 的字段只作用于传入的适配器，与改用 ContextVar 之前一致
+_log_context: ContextVar[dict["ExtraLogAdapter", dict[str, Any]]] = ContextVar("_ipc_log_ctx", default={})
 
 
 class JSONFormatter(logging.Formatter):
@@ -40,7 +66,7 @@ class JSONFormatter(logging.Formatter):
             log_entry["exception"] = self.formatException(record.exc_info)
             log_entry["exception_type"] = record.exc_info[0].__name__ if record.exc_info[0] else None
 
-        return json.dumps(log_entry, ensure_ascii=False)
+        return _dumps(log_entry)
 
 
 class TextFormatter(logging.Formatter):
@@ -50,8 +76,22 @@ class TextFormatter(logging.Formatter):
     人类可读的日志格式，适合开发环境。
     """
 
+    def __init__(self) -> None:
+        super().__init__()
+        # (秒, 格式化结果)；同一秒内的日志复用同一个时间戳字符串
+        self._cached_timestamp: tuple[int, str] = (-1, "")
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        cached_second, cached_text = self._cached_timestamp
+        if second == cached_second:
+            return cached_text
+        text = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(second))
+        self._cached_timestamp = (second, text)
+        return text
+
     def format(self, record: logging.LogRecord) -> str:
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = self._timestamp(record.created)
         base = f"[{timestamp}] [{record.levelname:5}] [{record.name}] {record.getMessage()}"
 
         # 添加额外字段
@@ -78,9 +118,15 @@ class ExtraLogAdapter(logging.LoggerAdapter):
         msg: str,
         kwargs: MutableMapping[str, Any],
     ) -> tuple[str, MutableMapping[str, Any]]:
-        extra_fields = kwargs.pop("extra_fields", {})
-        if self.extra:
-            extra_fields.update(self.extra)
+        contexts = _log_context.get()
+        context_fields = contexts.get(self) if contexts else None
+        if not self.extra and not context_fields and "extra_fields" not in kwargs:
+            return msg, kwargs
+
+        extra_fields = kwargs.pop("extra_fields", None) or {}
+        if self.extra or context_fields:
+            # 合并到新字典，避免改写调用方传入的 extra_fields
+            extra_fields = {**extra_fields, **(self.extra or {}), **(context_fields or {})}
 
         if extra_fields:
             extra_value = kwargs.get("extra")
@@ -144,20 +190,22 @@ class LogContext:
     """
     日志上下文管理器
 
-    用于在代码块中添加额外的日志字段。
+    用于在代码块中为指定的日志适配器添加额外字段。字段保存在 ContextVar 中，
+    退出时通过 token 还原，线程与 asyncio 任务之间互不干扰；其他适配器不受影响。
     """
 
     def __init__(self, logger: ExtraLogAdapter, **fields: Any):
         self.logger = logger
         self.fields = fields
-        current_extra = logger.extra if isinstance(logger.extra, dict) else {}
-        self.original_extra = dict(current_extra)
+        self._token: Token[dict[ExtraLogAdapter, dict[str, Any]]] | None = None
 
     def __enter__(self) -> "LogContext":
-        if not isinstance(self.logger.extra, dict):
-            self.logger.extra = {}
-        cast(dict[str, Any], self.logger.extra).update(self.fields)
+        contexts = _log_context.get()
+        scoped = {**contexts.get(self.logger, {}), **self.fields}
+        self._token = _log_context.set({**contexts, self.logger: scoped})
         return self
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
-        self.logger.extra = self.original_extra
+        if self._token is not None:
+            _log_context.reset(self._token)
+            self._token = None
@@ -6,8 +6,10 @@
 
 from __future__ import annotations
 
+import heapq
 import threading
 import time
+from array import array
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from typing import Any
@@ -15,8 +17,16 @@ from typing import Any
 from ..constants import METRICS_HISTOGRAM_WINDOW
 
 
-def _new_histogram_values() -> deque[float]:
-    return deque(maxlen=max(1, int(METRICS_HISTOGRAM_WINDOW)))
+def _histogram_window() -> int:
+    return max(1, int(METRICS_HISTOGRAM_WINDOW))
+
+
+def _new_histogram_values() -> array[float]:
+    return array("d")
+
+
+def _empty_histogram_stats() -> dict[str, float]:
+    return {"count": 0, "sum": 0, "avg": 0, "min": 0, "max": 0, "p99": 0}
 
 
 @dataclass
@@ -41,38 +51,76 @@ class Counter:
 
 @dataclass
 class Histogram:
-    """直方图指标"""
+    """
+    直方图指标
+
+    在固定窗口内保留最近的观测值，存放于 array('d') 环形缓冲区
+    （每个值 8 字节，而非装箱 float）。sum/min/max 随 observe 增量维护
+    （min/max 使用单调队列），get_stats 只需对 p99 做一次 top-k 选择。
+    """
 
-    values: deque[float] = field(default_factory=_new_histogram_values)
+    values: array[float] = field(default_factory=_new_histogram_values)
+    capacity: int = field(default_factory=_histogram_window)
+    _next: int = field(default=0, repr=False)
+    _sum: float = field(default=0.0, repr=False)
+    _min_window: deque[float] = field(default_factory=deque, repr=False)
+    _max_window: deque[float] = field(default_factory=deque, repr=False)
     _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
     def observe(self, value: float) -> None:
         with self._lock:
-            self.values.append(value)
+            values = self.values
+            if len(values) < self.capacity:
+                # 窗口未满时按需增长，低频指标不必预分配整个窗口
+                values.append(value)
+            else:
+                idx = self._next
+                evicted = values[idx]
+                values[idx] = value
+                self._next = (idx + 1) % self.capacity
+                self._sum -= evicted
+                if self._min_window[0] == evicted:
+                    self._min_window.popleft()
+                if self._max_window[0] == evicted:
+                    self._max_window.popleft()
+            self._sum += value
+
+            min_window = self._min_window
+            while min_window and min_window[-1] > value:
+                min_window.pop()
+            min_window.append(value)
+            max_window = self._max_window
+            while max_window and max_window[-1] < value:
+                max_window.pop()
+            max_window.append(value)
 
     def get_stats(self) -> dict[str, float]:
         with self._lock:
-            if not self.values:
-                return {"count": 0, "sum": 0, "avg": 0, "min": 0, "max": 0, "p99": 0}
+            count = len(self.values)
+            if not count:
+                return _empty_histogram_stats()
 
-            sorted_values = sorted(list(self.values))
-            count = len(sorted_values)
-            total = sum(sorted_values)
-            avg = total / count
-            p99_index = int(count * 0.99)
+            total = self._sum
+            p99_index = min(int(count * 0.99), count - 1)
+            # 第 p99_index 小的值即第 (count - p99_index) 大的值，只需选出前 ~1%
+            p99 = heapq.nlargest(count - p99_index, self.values)[-1]
 
             return {
                 "count": count,
                 "sum": total,
-                "avg": avg,
-                "min": sorted_values[0],
-                "max": sorted_values[-1],
-                "p99": sorted_values[min(p99_index, count - 1)],
+                "avg": total / count,
+                "min": self._min_window[0],
+                "max": self._max_window[0],
+                "p99": p99,
             }
 
     def reset(self) -> None:
         with self._lock:
-            self.values.clear()
+            del self.values[:]
+            self._next = 0
+            self._sum = 0.0
+            self._min_window.clear()
+            self._max_window.clear()
 
 
 @dataclass
@@ -111,8 +159,9 @@ class Metrics:
         self._counters[name].increment(delta)
 
     def counter_get(self, name: str) -> int:
-        """获取计数器值"""
-        return self._counters[name].get()
+        """获取计数器值（不存在时返回 0，且不会创建新指标）"""
+        counter = self._counters.get(name)
+        return counter.get() if counter is not None else 0
 
     # === 直方图操作 ===
 
@@ -121,8 +170,9 @@ class Metrics:
         self._histograms[name].observe(value)
 
     def histogram_get_stats(self, name: str) -> dict[str, float]:
-        """获取直方图统计"""
-        return self._histograms[name].get_stats()
+        """获取直方图统计（不存在时返回空统计，且不会创建新指标）"""
+        hist = self._histograms.get(name)
+        return hist.get_stats() if hist is not None else _empty_histogram_stats()
 
     # === 仪表操作 ===
 
@@ -131,8 +181,9 @@ class Metrics:
         self._gauges[name].set(value)
 
     def gauge_get(self, name: str) -> float:
-        """获取仪表值"""
-        return self._gauges[name].get()
+        """获取仪表值（不存在时返回 0.0，且不会创建新指标）"""
+        gauge = self._gauges.get(name)
+        return gauge.get() if gauge is not None else 0.0
 
     # === 便捷方法 ===
 
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import json
 import re
-from dataclasses import dataclass
+import sqlite3
+from bisect import bisect_left, bisect_right
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 
@@ -14,15 +19,23 @@ PAGE_TOKEN_RE = re.compile(r"\bPAGE\s+[0-9A-Z]+\b", re.I)
 FIG_LINE_RE = re.compile(r"^FIG\.?\s+(.+)$", re.I)
 FIGURE_LINE_RE = re.compile(r"^FIGURE\s+(.+)$", re.I)
 
+# Footer variants run once over the newline-joined footer lines: [^\S\n] keeps a match inside one
+# line (as the per-line patterns above do), and the fig alternation keeps FIG. ahead of FIGURE.
+_FOOTER_DATE_RE = re.compile(rf"\b{MONTHS}[^\S\n]+\d{{1,2}}/\d{{2}}\b", re.I)
+_FOOTER_PAGE_RE = re.compile(r"\bPAGE[^\S\n]+[0-9A-Z]+\b", re.I)
+_FOOTER_FIG_RE = re.compile(r"^(?:FIG\.?[^\S\n]+(?P<fig>.+)|FIGURE[^\S\n]+(?P<figure>.+))$", re.I | re.M)
+
 NOM_LEADING_DOTS_RE = re.compile(r"^\s*(\.+)\s*(.*)$", re.S)
+WS_RE = re.compile(r"\s+")
+FIG_SUFFIX_RE = re.compile(r"(\d{1,2})([A-Z]?)")
 
 
 def _canon_figure_suffix(raw: str) -> str:
     s = (raw or "").strip().upper()
-    s = re.sub(r"\s+", "", s)
+    s = WS_RE.sub("", s)
     if not s:
         return ""
-    m = re.fullmatch(r"(\d{1,2})([A-Z]?)", s)
+    m = FIG_SUFFIX_RE.fullmatch(s)
     if not m:
         return s
     digits = m.group(1) or ""
@@ -32,21 +45,39 @@ def _canon_figure_suffix(raw: str) -> str:
     return digits + suffix
 
 
+_YX_KEY = itemgetter(0, 1)
+
+
 def _words_by_y(words: list[tuple[Any, ...]], y_tol: float = 2.0) -> list[tuple[float, list[tuple[Any, ...]]]]:
-    items = sorted(words, key=lambda w: (float(w[1]), float(w[0])))
-    groups: list[tuple[float, list[tuple[Any, ...]]]] = []
-    for w in items:
-        y = float(w[1])
-        if not groups or abs(y - groups[-1][0]) > y_tol:
-            groups.append((y, [w]))
+    # decorate once so each coordinate is converted a single time, then group in one linear pass
+    keyed = [(float(w[1]), float(w[0]), w) for w in words]
+    if not keyed:
+        return []
+    keyed.sort(key=_YX_KEY)
+    group_y, _, first = keyed[0]
+    current = [first]
+    groups: list[tuple[float, list[tuple[Any, ...]]]] = [(group_y, current)]
+    append = current.append
+    for y, _, w in keyed[1:]:
+        if abs(y - group_y) > y_tol:
+            group_y = y
+            current = [w]
+            append = current.append
+            groups.append((y, current))
         else:
-            groups[-1][1].append(w)
+            append(w)
     return groups
 
 
 def _join_words_line(words: list[tuple[Any, ...]], sep: str = " ") -> str:
-    parts = [str(w[4]).strip() for w in sorted(words, key=lambda w: float(w[0])) if str(w[4]).strip()]
-    return re.sub(r"\s+", " ", sep.join(parts)).strip()
+    parts = [t for w in sorted(words, key=lambda w: float(w[0])) if (t := str(w[4]).strip())]
+    return WS_RE.sub(" ", sep.join(parts)).strip()
+
+
+def _concat_pn_cell(words: list[tuple[Any, ...]]) -> str:
+    # PN cell of one y-group: words in x order, every whitespace run dropped, upper-cased; one join + split
+    # instead of join, regex collapse, replace, strip and upper over the same text
+    return "".join("".join(str(w[4]) for w in sorted(words, key=lambda w: float(w[0]))).split()).upper()
 
 
 def _nomenclature_level(nomenclature_first_line: str) -> int:
@@ -65,6 +96,12 @@ def _pt(cm: float) -> float:
 
 COORD_META_RECT = fitz.Rect(_pt(16.3), _pt(25.4), _pt(19.5), _pt(27.4))
 COORD_TABLE_RECT = fitz.Rect(_pt(2.3), _pt(2.5), _pt(19.5), _pt(25.4))
+
+# Pinned extraction flags (ligatures + whitespace kept, mediabox clip, CID for unknown glyphs).
+# Dehyphenation, span/image/vector collection are already off; dropping ligature preservation
+# would make MuPDF expand ligatures (more work) and change word text.
+TABLE_WORD_FLAGS = fitz.TEXTFLAGS_WORDS
+META_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT
 COORD_Y_SCAN_START = _pt(3.8)
 COORD_Y_TABLE_BOTTOM = _pt(25.4)
 COORD_COLS_X = {
@@ -83,110 +120,158 @@ class FooterMeta:
     page_token: str | None
 
 
-def parse_footer_meta_from_page(page: fitz.Page) -> FooterMeta:
-    text = page.get_text("text", clip=COORD_META_RECT) or ""
+def meta_textpage(page: fitz.Page) -> fitz.TextPage:
+    return page.get_textpage(clip=COORD_META_RECT, flags=META_TEXT_FLAGS)
+
+
+def table_textpage(page: fitz.Page) -> fitz.TextPage:
+    return page.get_textpage(clip=COORD_TABLE_RECT, flags=TABLE_WORD_FLAGS)
+
+
+def parse_footer_meta_from_page(page: fitz.Page, *, textpage: fitz.TextPage | None = None) -> FooterMeta:
+    if textpage is None:
+        text = page.get_text("text", clip=COORD_META_RECT, flags=META_TEXT_FLAGS) or ""
+    else:
+        text = page.get_text("text", textpage=textpage) or ""
     lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
     prefix = (lines[0].upper() if lines else "")
+    # first match in line order wins, as when the lines were scanned one by one
+    window = "\n".join(lines[1:12])
+    page_match = _FOOTER_PAGE_RE.search(window)
+    page_token = page_match.group(0).upper() if page_match else None
+    date_match = _FOOTER_DATE_RE.search(window)
+    date_text = date_match.group(0).upper() if date_match else None
     fig_label = None
     fig_code = None
-    date_text = None
-    page_token = None
-    for ln in lines[1:12]:
-        if not page_token:
-            page_match = PAGE_TOKEN_RE.search(ln)
-            if page_match:
-                page_token = page_match.group(0).upper()
-        if not date_text:
-            date_match = DATE_RE.search(ln)
-            if date_match:
-                date_text = date_match.group(0).upper()
-        if not fig_label:
-            m = FIG_LINE_RE.match(ln)
-            if m:
-                fig_label = "FIG. " + m.group(1).strip()
-                fig_code = prefix + "-" + _canon_figure_suffix(m.group(1))
-                continue
-            m = FIGURE_LINE_RE.match(ln)
-            if m:
-                fig_label = "FIGURE " + m.group(1).strip()
-                fig_code = prefix + "-" + _canon_figure_suffix(m.group(1))
-                continue
+    m = _FOOTER_FIG_RE.search(window)
+    if m:
+        raw = m.group("fig")
+        if raw is not None:
+            fig_label = "FIG. " + raw.strip()
+        else:
+            raw = m.group("figure")
+            fig_label = "FIGURE " + raw.strip()
+        fig_code = prefix + "-" + _canon_figure_suffix(raw)
     return FooterMeta(prefix=prefix, figure_code=fig_code, figure_label=fig_label, date_text=date_text, page_token=page_token)
 
 
-def find_part_rows_on_page(pdf_path: Path, page_num: int, part_number: str) -> list[dict[str, Any]]:
+def find_part_rows_on_page(
+    pdf_path: Path,
+    page_num: int,
+    part_number: str,
+    *,
+    doc: fitz.Document | None = None,
+) -> list[dict[str, Any]]:
+    pn_target = (part_number or "").strip().upper()
+    if not pn_target:
+        return []
+    if doc is None:
+        return find_part_rows_in_columns(_cached_page_columns(*_pdf_cache_key(pdf_path), page_num), pn_target)
+    return find_part_rows_in_words(table_words_on_page(doc[page_num - 1]), pn_target)
+
+
+def table_words_on_page(page: fitz.Page, *, textpage: fitz.TextPage | None = None) -> list[tuple[Any, ...]]:
+    if textpage is None:
+        return page.get_text("words", clip=COORD_TABLE_RECT, flags=TABLE_WORD_FLAGS) or []
+    return page.get_text("words", textpage=textpage) or []
+
+
+# (center_x, center_y, word)
+CenteredWord = tuple[float, float, tuple[Any, ...]]
+
+
+@dataclass(frozen=True)
+class TableColumns:
+    """
+    Table words split by column once per page, so several part numbers (or the row extractor)
+    can be matched against the same page without re-filtering every word.
+    Column words are sorted by center y (``*_cys`` holds the keys) so y-bands are found by bisection.
+    """
+
+    pn_lines: list[tuple[float, str]]  # (y, joined PN text) per y-group in the part_number column band
+    fig_words: list[CenteredWord]
+    fig_cys: list[float]
+    nom_words: list[CenteredWord]
+    nom_cys: list[float]
+
+
+def split_table_columns(words: list[tuple[Any, ...]]) -> TableColumns:
+    x0, x1 = COORD_COLS_X["part_number"]
+    fx0, fx1 = COORD_COLS_X["fig_item"]
+    nx0, nx1 = COORD_COLS_X["nomenclature"]
+
+    # one record per word with its center computed once; the column filters are then plain
+    # comprehensions over the records (no per-word unpacking/float() or list.append calls)
+    centered: list[CenteredWord] = [((w[0] + w[2]) / 2.0, (w[1] + w[3]) / 2.0, w) for w in words]
+    fig_words = [cw for cw in centered if fx0 <= cw[0] <= fx1]
+    nom_words = [cw for cw in centered if nx0 <= cw[0] <= nx1]
+    pn_words = [
+        cw[2] for cw in centered if x0 <= cw[0] <= x1 and COORD_Y_SCAN_START <= cw[1] <= COORD_Y_TABLE_BOTTOM
+    ]
+
+    pn_lines = [
+        (float(y), _concat_pn_cell(grp))
+        for y, grp in _words_by_y(pn_words, y_tol=2.0)
+    ]
+    fig_words.sort(key=lambda cw: cw[1])
+    nom_words.sort(key=lambda cw: cw[1])
+    return TableColumns(
+        pn_lines=pn_lines,
+        fig_words=fig_words,
+        fig_cys=[cw[1] for cw in fig_words],
+        nom_words=nom_words,
+        nom_cys=[cw[1] for cw in nom_words],
+    )
+
+
+def _words_near_y(col_words: list[CenteredWord], cys: list[float], y: float, tol: float) -> list[tuple[Any, ...]]:
+    # bisect a slightly widened window, then apply the exact predicate to the few candidates
+    lo = bisect_left(cys, max(y - tol, COORD_Y_SCAN_START) - 1e-6)
+    hi = bisect_right(cys, min(y + tol, COORD_Y_TABLE_BOTTOM) + 1e-6)
+    return [
+        w
+        for _, cy, w in col_words[lo:hi]
+        if COORD_Y_SCAN_START <= cy <= COORD_Y_TABLE_BOTTOM and abs(cy - y) <= tol
+    ]
+
+
+def find_part_rows_in_columns(columns: TableColumns, part_number: str) -> list[dict[str, Any]]:
     pn_target = (part_number or "").strip().upper()
     if not pn_target:
         return []
-    with fitz.open(str(pdf_path)) as doc:
-        page = doc[page_num - 1]
-        words = page.get_text("words", clip=COORD_TABLE_RECT) or []
-
-        x0, x1 = COORD_COLS_X["part_number"]
-        fx0, fx1 = COORD_COLS_X["fig_item"]
-        nx0, nx1 = COORD_COLS_X["nomenclature"]
-
-        pn_words: list[tuple[Any, ...]] = []
-        fig_words: list[tuple[Any, ...]] = []
-        nom_words: list[tuple[Any, ...]] = []
-        for w in words:
-            wx0, wy0, wx1, wy1, *_ = w
-            cx = (float(wx0) + float(wx1)) / 2.0
-            cy = (float(wy0) + float(wy1)) / 2.0
-            if cy < COORD_Y_SCAN_START or cy > COORD_Y_TABLE_BOTTOM:
-                continue
-            if x0 <= cx <= x1:
-                pn_words.append(w)
-            if fx0 <= cx <= fx1:
-                fig_words.append(w)
-            if nx0 <= cx <= nx1:
-                nom_words.append(w)
-
-        hits_y: list[float] = []
-        for y, grp in _words_by_y(pn_words, y_tol=2.0):
-            pn = _join_words_line(grp, sep="").replace(" ", "").strip().upper()
-            if pn == pn_target:
-                hits_y.append(float(y))
-
-        out: list[dict[str, Any]] = []
-        for y in hits_y:
-            fig_near = [
-                w for w in fig_words if abs(((float(w[1]) + float(w[3])) / 2.0) - float(y)) <= 6.0
-            ]
-            fig_item = _join_words_line(fig_near, sep=" ").strip()
-
-            nom_near = [
-                w for w in nom_words if abs(((float(w[1]) + float(w[3])) / 2.0) - float(y)) <= 9.0
-            ]
-            nom_first = _join_words_line(nom_near, sep=" ").strip()
-            nom_level = _nomenclature_level(nom_first)
-
-            out.append({"y": y, "fig_item": fig_item, "nomenclature_first": nom_first, "nom_level": nom_level})
-
-        return out
+
+    hits_y = [y for y, pn in columns.pn_lines if pn == pn_target]
+
+    out: list[dict[str, Any]] = []
+    for y in hits_y:
+        fig_near = _words_near_y(columns.fig_words, columns.fig_cys, y, 6.0)
+        fig_item = _join_words_line(fig_near, sep=" ").strip()
+
+        nom_near = _words_near_y(columns.nom_words, columns.nom_cys, y, 9.0)
+        nom_first = _join_words_line(nom_near, sep=" ").strip()
+        nom_level = _nomenclature_level(nom_first)
+
+        out.append({"y": y, "fig_item": fig_item, "nomenclature_first": nom_first, "nom_level": nom_level})
+
+    return out
+
+
+def find_part_rows_in_words(words: list[tuple[Any, ...]], part_number: str) -> list[dict[str, Any]]:
+    """Same as find_part_rows_on_page, on words already taken from table_words_on_page."""
+    if not (part_number or "").strip():
+        return []
+    return find_part_rows_in_columns(split_table_columns(words), part_number)
 
 
 def _coords_col_text(
-    table_words: list[tuple[Any, ...]],
-    col: str,
+    col_words: list[CenteredWord],
+    cys: list[float],
     y0: float,
     y1: float,
     *,
     y_tol: float = 2.0,
 ) -> str:
-    if col not in COORD_COLS_X:
-        return ""
-    x0, x1 = COORD_COLS_X[col]
-    picked: list[tuple[Any, ...]] = []
-    for w in table_words:
-        wx0, wy0, wx1, wy1, *_ = w
-        cx = (float(wx0) + float(wx1)) / 2.0
-        cy = (float(wy0) + float(wy1)) / 2.0
-        if cx < x0 or cx > x1:
-            continue
-        if cy < y0 or cy >= y1:
-            continue
-        picked.append(w)
+    picked = [w for _, _, w in col_words[bisect_left(cys, y0) : bisect_left(cys, y1)]]
     if not picked:
         return ""
     lines = []
@@ -197,41 +282,199 @@ def _coords_col_text(
     return "\n".join(lines).strip()
 
 
+_PN_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-./")
+_PN_RE = re.compile(r"[A-Z0-9][A-Z0-9\-\./]*")
+
+
 def _looks_like_part_number(s: str) -> bool:
     t = (s or "").strip().upper()
     if not t:
         return False
     if t.isdigit():
         return len(t) >= 3
+    # allow typical IPC PN charset; the set test rejects most non-PN cells without entering the regex
+    if not _PN_CHARS.issuperset(t):
+        return False
     if not any(ch.isdigit() for ch in t):
         return False
-    # allow typical IPC PN charset
-    return bool(re.fullmatch(r"[A-Z0-9][A-Z0-9\-\./]*", t))
-
+    return _PN_RE.fullmatch(t) is not None
 
-def _coords_part_number_anchors(table_words: list[tuple[Any, ...]]) -> list[tuple[float, str]]:
-    x0, x1 = COORD_COLS_X["part_number"]
-    picked: list[tuple[Any, ...]] = []
-    for w in table_words:
-        wx0, wy0, wx1, wy1, *_ = w
-        cx = (float(wx0) + float(wx1)) / 2.0
-        cy = (float(wy0) + float(wy1)) / 2.0
-        if cx < x0 or cx > x1:
-            continue
-        if cy < COORD_Y_SCAN_START or cy > COORD_Y_TABLE_BOTTOM:
-            continue
-        picked.append(w)
 
+def _coords_part_number_anchors(pn_lines: list[tuple[float, str]]) -> list[tuple[float, str]]:
     anchors: list[tuple[float, str]] = []
     dedup_y_tol = 3.0
-    for y, grp in _words_by_y(picked, y_tol=2.0):
-        pn = _join_words_line(grp, sep="").replace(" ", "").strip().upper()
+    last_y = 0.0
+    last_pn: str | None = None
+    for y, pn in pn_lines:
         if not _looks_like_part_number(pn):
             continue
-        if anchors and pn == anchors[-1][1] and abs(float(y) - float(anchors[-1][0])) <= dedup_y_tol:
+        y = float(y)
+        if pn == last_pn and abs(y - last_y) <= dedup_y_tol:
             continue
-        anchors.append((float(y), pn))
-    return sorted(anchors, key=lambda x: x[0])
+        anchors.append((y, pn))
+        last_y, last_pn = y, pn
+    # pn_lines come from _words_by_y and are normally already in y order, which sort() detects in one pass
+    anchors.sort(key=itemgetter(0))
+    return anchors
+
+
+def extract_rows_from_columns(columns: TableColumns) -> list[dict[str, Any]]:
+    anchors = _coords_part_number_anchors(columns.pn_lines)
+    out: list[dict[str, Any]] = []
+    for i, (y0, pn) in enumerate(anchors):
+        y_start = float(y0)
+        y_end = float(anchors[i + 1][0]) if (i + 1) < len(anchors) else float(COORD_Y_TABLE_BOTTOM)
+        fig_item_text = _coords_col_text(columns.fig_words, columns.fig_cys, y_start, y_end)
+        fig_item_text = (fig_item_text.splitlines()[0].strip() if fig_item_text.strip() else "")
+        nom = _coords_col_text(columns.nom_words, columns.nom_cys, y_start, y_end)
+        first = (nom.splitlines()[0] if nom.strip() else "").strip()
+        out.append(
+            {
+                "y": y_start,
+                "part_number": pn,
+                "fig_item": fig_item_text,
+                "nomenclature_first": first,
+                "nom_level": _nomenclature_level(first),
+            }
+        )
+    return out
+
+
+def extract_rows_from_words(table_words: list[tuple[Any, ...]]) -> list[dict[str, Any]]:
+    """Same as extract_rows_on_page, on words already taken from table_words_on_page."""
+    return extract_rows_from_columns(split_table_columns(table_words))
+
+
+# Path-based entry points are memoized per (resolved path, mtime_ns, page_num), so repeated QA samples
+# on the same page skip fitz.open/get_text; a modified PDF gets a new key.
+PAGE_CACHE_SIZE = 4096
+
+
+def _pdf_cache_key(pdf_path: Path) -> tuple[str, int]:
+    resolved = Path(pdf_path).resolve()
+    return str(resolved), resolved.stat().st_mtime_ns
+
+
+@lru_cache(maxsize=PAGE_CACHE_SIZE)
+def _cached_page_truth(pdf_path: str, mtime_ns: int, page_num: int) -> tuple[TableColumns, FooterMeta]:
+    # One open + page load for both clips; each clip gets a single TextPage, released right after use.
+    with fitz.open(pdf_path) as doc:
+        page = doc[page_num - 1]
+        tp = table_textpage(page)
+        columns = split_table_columns(table_words_on_page(page, textpage=tp))
+        tp = meta_textpage(page)
+        meta = parse_footer_meta_from_page(page, textpage=tp)
+        del tp
+        return columns, meta
+
+
+def _cached_page_columns(pdf_path: str, mtime_ns: int, page_num: int) -> TableColumns:
+    return _cached_page_truth(pdf_path, mtime_ns, page_num)[0]
+
+
+@lru_cache(maxsize=PAGE_CACHE_SIZE)
+def _cached_page_rows(pdf_path: str, mtime_ns: int, page_num: int) -> tuple[dict[str, Any], ...]:
+    return tuple(extract_rows_from_columns(_cached_page_columns(pdf_path, mtime_ns, page_num)))
+
+
+def _cached_footer_meta(pdf_path: str, mtime_ns: int, page_num: int) -> FooterMeta:
+    return _cached_page_truth(pdf_path, mtime_ns, page_num)[1]
+
+
+def clear_pdf_caches() -> None:
+    _cached_page_truth.cache_clear()
+    _cached_page_rows.cache_clear()
+
+
+DEFAULT_TRUTH_CACHE = Path("data/cache/pdf_truth.sqlite")
+
+
+class TruthCache:
+    """
+    Persistent sidecar for per-page PDF truth (table words, footer meta), keyed by
+    (resolved path, mtime_ns, page_num), so repeated QA runs on unchanged PDFs skip MuPDF.
+    Best effort: any sqlite error is treated as a miss / dropped write.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # autocommit + WAL: several QA worker processes may write the same sidecar
+        self._conn = sqlite3.connect(str(path), timeout=30.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS page_truth (
+              pdf_path TEXT NOT NULL,
+              mtime_ns INTEGER NOT NULL,
+              page_num INTEGER NOT NULL,
+              kind TEXT NOT NULL,
+              value TEXT NOT NULL,
+              PRIMARY KEY (pdf_path, mtime_ns, page_num, kind)
+            )
+            """
+        )
+        self._keys: dict[Path, tuple[str, int]] = {}
+
+    @classmethod
+    def open(cls, path: Path) -> TruthCache | None:
+        try:
+            return cls(path)
+        except (OSError, sqlite3.Error):
+            return None
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> TruthCache:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _key(self, pdf_path: Path) -> tuple[str, int]:
+        key = self._keys.get(pdf_path)
+        if key is None:
+            key = self._keys[pdf_path] = _pdf_cache_key(pdf_path)
+        return key
+
+    def _get(self, pdf_path: Path, page_num: int, kind: str) -> Any:
+        key = self._key(pdf_path)
+        try:
+            row = self._conn.execute(
+                "SELECT value FROM page_truth WHERE pdf_path=? AND mtime_ns=? AND page_num=? AND kind=?",
+                (*key, page_num, kind),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _put(self, pdf_path: Path, page_num: int, kind: str, value: Any) -> None:
+        key = self._key(pdf_path)
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_truth (pdf_path, mtime_ns, page_num, kind, value) VALUES (?, ?, ?, ?, ?)",
+                (*key, page_num, kind, json.dumps(value, ensure_ascii=False)),
+            )
+        except sqlite3.Error:
+            pass
+
+    def table_words(self, pdf_path: Path, page_num: int) -> list[tuple[Any, ...]] | None:
+        words = self._get(pdf_path, page_num, "words")
+        return [tuple(w) for w in words] if words is not None else None
+
+    def put_table_words(self, pdf_path: Path, page_num: int, words: list[tuple[Any, ...]]) -> None:
+        self._put(pdf_path, page_num, "words", words)
+
+    def footer_meta(self, pdf_path: Path, page_num: int) -> FooterMeta | None:
+        meta = self._get(pdf_path, page_num, "meta")
+        return FooterMeta(**meta) if meta is not None else None
+
+    def put_footer_meta(self, pdf_path: Path, page_num: int, meta: FooterMeta) -> None:
+        self._put(pdf_path, page_num, "meta", asdict(meta))
+
+
+def footer_meta_on_page(pdf_path: Path, page_num: int) -> FooterMeta:
+    return _cached_footer_meta(*_pdf_cache_key(pdf_path), page_num)
 
 
 def extract_rows_on_page(pdf_path: Path, page_num: int) -> list[dict[str, Any]]:
@@ -239,63 +482,76 @@ def extract_rows_on_page(pdf_path: Path, page_num: int) -> list[dict[str, Any]]:
     Extract table rows on a page using the same "fixed coordinates + y segments" idea.
     This is used as a PDF-grounded oracle for QA, not as the production extractor.
     """
-    with fitz.open(str(pdf_path)) as doc:
-        page = doc[page_num - 1]
-        table_words = page.get_text("words", clip=COORD_TABLE_RECT) or []
-        anchors = _coords_part_number_anchors(table_words)
-        out: list[dict[str, Any]] = []
-        for i, (y0, pn) in enumerate(anchors):
-            y_start = float(y0)
-            y_end = float(anchors[i + 1][0]) if (i + 1) < len(anchors) else float(COORD_Y_TABLE_BOTTOM)
-            fig_item_text = _coords_col_text(table_words, "fig_item", y_start, y_end)
-            fig_item_text = (fig_item_text.splitlines()[0].strip() if fig_item_text.strip() else "")
-            nom = _coords_col_text(table_words, "nomenclature", y_start, y_end)
-            first = (nom.splitlines()[0] if nom.strip() else "").strip()
-            out.append(
-                {
-                    "y": y_start,
-                    "part_number": pn,
-                    "fig_item": fig_item_text,
-                    "nomenclature_first": first,
-                    "nom_level": _nomenclature_level(first),
-                }
-            )
-        return out
+    # copy the cached rows so callers can mutate them freely
+    return [dict(r) for r in _cached_page_rows(*_pdf_cache_key(pdf_path), page_num)]
 
 
-def truth_parent_for_row(pdf_path: Path, page_num: int, part_number: str, fig_item: str | None) -> dict[str, str]:
+def truth_parent_for_row(
+    pdf_path: Path,
+    page_num: int,
+    part_number: str,
+    fig_item: str | None,
+    *,
+    doc: fitz.Document | None = None,
+    meta_by_page: dict[int, FooterMeta] | None = None,
+    rows_by_page: dict[int, list[dict[str, Any]]] | None = None,
+) -> dict[str, str]:
     """
     Build a PDF-truth hierarchy within the same footer figure_code (across all pages of that figure),
     then return the parent/root part_number for the requested row.
+
+    Pass an already opened ``doc`` to avoid re-opening ``pdf_path``. ``meta_by_page`` / ``rows_by_page``
+    (keyed by 1-based page number) let callers share footer meta and extracted rows across calls.
     """
+    if doc is None:
+        with fitz.open(str(pdf_path)) as opened:
+            return truth_parent_for_row(
+                pdf_path,
+                page_num,
+                part_number,
+                fig_item,
+                doc=opened,
+                meta_by_page=meta_by_page,
+                rows_by_page=rows_by_page,
+            )
+
     pn_target = (part_number or "").strip().upper()
     fig_item_target = (fig_item or "").strip()
 
-    with fitz.open(str(pdf_path)) as doc:
-        if page_num < 1 or page_num > doc.page_count:
-            return {"parent": "", "root": "", "figure_code": ""}
-        meta = parse_footer_meta_from_page(doc[page_num - 1])
-        code = (meta.figure_code or "").strip().upper()
-        if not code:
-            return {"parent": "", "root": "", "figure_code": ""}
-
-        # gather pages belonging to this figure_code, up to current page
-        pages = []
-        for i in range(doc.page_count):
-            m = parse_footer_meta_from_page(doc[i])
-            if (m.figure_code or "").strip().upper() == code:
-                pages.append(i + 1)
-        pages = [p for p in pages if p <= page_num]
-        pages.sort()
-
-    # build stack using extracted rows in page order, then y order
+    if page_num < 1 or page_num > doc.page_count:
+        return {"parent": "", "root": "", "figure_code": ""}
+
+    meta_cache = meta_by_page if meta_by_page is not None else {}
+    rows_cache = rows_by_page if rows_by_page is not None else {}
+
+    def page_meta(p: int) -> FooterMeta:
+        meta = meta_cache.get(p)
+        if meta is None:
+            meta = parse_footer_meta_from_page(doc[p - 1])
+            meta_cache[p] = meta
+        return meta
+
+    def page_rows(p: int) -> list[dict[str, Any]]:
+        rows = rows_cache.get(p)
+        if rows is None:
+            rows = extract_rows_from_words(table_words_on_page(doc[p - 1]))
+            rows_cache[p] = rows
+        return rows
+
+    code = (page_meta(page_num).figure_code or "").strip().upper()
+    if not code:
+        return {"parent": "", "root": "", "figure_code": ""}
+
+    # single pass over the pages up to the current one: pages of this figure_code feed the
+    # stack in page order, then y order. Only rows on the target page with the target PN are
+    # recorded, keyed by fig_item (last write wins, first-seen order kept).
     stack: list[str] = []
-    parent_for_key: dict[tuple[int, str, str], str] = {}
-    root_for_key: dict[tuple[int, str, str], str] = {}
+    target_rows: dict[str, tuple[str, str]] = {}
 
-    for p in pages:
-        rows = extract_rows_on_page(pdf_path, p)
-        rows.sort(key=lambda r: float(r.get("y") or 0.0))
+    for p in range(1, page_num + 1):
+        if (page_meta(p).figure_code or "").strip().upper() != code:
+            continue
+        rows = sorted(page_rows(p), key=lambda r: float(r.get("y") or 0.0))
         for r in rows:
             pn = str(r.get("part_number") or "").strip().upper()
             fig = str(r.get("fig_item") or "").strip()
@@ -309,22 +565,16 @@ def truth_parent_for_row(pdf_path: Path, page_num: int, part_number: str, fig_it
             stack[lvl] = pn
             del stack[lvl + 1 :]
 
-            root = stack[0] if stack else ""
-            parent_for_key[(p, pn, fig)] = parent
-            root_for_key[(p, pn, fig)] = root
+            if p == page_num and pn == pn_target:
+                root = stack[0] if stack else ""
+                target_rows[fig] = (parent, root)
 
     # try to match
-    key_candidates = [k for k in parent_for_key.keys() if k[0] == page_num and k[1] == pn_target]
-    if not key_candidates:
+    if not target_rows:
         return {"parent": "", "root": "", "figure_code": code}
 
-    key = None
-    if fig_item_target:
-        for k in key_candidates:
-            if k[2] == fig_item_target:
-                key = k
-                break
-    if key is None:
-        key = key_candidates[0]
-
-    return {"parent": parent_for_key.get(key, ""), "root": root_for_key.get(key, ""), "figure_code": code}
+    hit = target_rows.get(fig_item_target) if fig_item_target else None
+    if hit is None:
+        hit = next(iter(target_rows.values()))
+    parent, root = hit
+    return {"parent": parent, "root": root, "figure_code": code}
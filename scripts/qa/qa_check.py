@@ -1,14 +1,43 @@
 from __future__ import annotations
 
 import json
+import os
 import sqlite3
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import repeat
 from pathlib import Path
+from typing import Any, NamedTuple
+
+import fitz  # PyMuPDF
 
 try:
-    from scripts.qa.pdf_truth import find_part_rows_on_page, parse_footer_meta_from_page, truth_parent_for_row
+    from scripts.qa.pdf_truth import (
+        DEFAULT_TRUTH_CACHE,
+        FooterMeta,
+        TableColumns,
+        TruthCache,
+        extract_rows_from_columns,
+        find_part_rows_in_columns,
+        parse_footer_meta_from_page,
+        split_table_columns,
+        table_words_on_page,
+        truth_parent_for_row,
+    )
 except ImportError:
-    from pdf_truth import find_part_rows_on_page, parse_footer_meta_from_page, truth_parent_for_row  # type: ignore
+    from pdf_truth import (  # type: ignore
+        DEFAULT_TRUTH_CACHE,
+        FooterMeta,
+        TableColumns,
+        TruthCache,
+        extract_rows_from_columns,
+        find_part_rows_in_columns,
+        parse_footer_meta_from_page,
+        split_table_columns,
+        table_words_on_page,
+        truth_parent_for_row,
+    )
 
 
 def _force_utf8_stdout() -> None:
@@ -40,6 +69,8 @@ def _fig_item_display(fig_raw: str | None, fig_no: str | None, not_illustrated:
 def _open_db(path: Path) -> sqlite3.Connection:
     conn = sqlite3.connect(str(path))
     conn.row_factory = sqlite3.Row
+    # read-only workload
+    conn.execute("PRAGMA query_only=ON")
     return conn
 
 
@@ -48,177 +79,334 @@ def _norm_fig_item_token(s: str) -> str:
     return t[2:] if t.startswith("- ") else t
 
 
+# Same SQL text on every call so sqlite3's per-connection statement cache reuses the prepared
+# statement. The plan seeks documents via idx_documents_pdf_name and parts via
+# idx_parts_doc_page(document_id, page_num); the PN expression is only a residual filter
+# over the rows of one page, so no extra index is needed.
+_FIND_ROWS_SQL = """
+SELECT
+  p.id,
+  d.pdf_name AS source_pdf,
+  p.page_num,
+  p.figure_code,
+  p.fig_item_raw,
+  p.fig_item_no,
+  p.not_illustrated,
+  p.part_number_cell,
+  p.part_number_canonical,
+  p.part_number_extracted,
+  p.nom_level,
+  p.parent_part_id,
+  coalesce(pp.part_number_cell, pp.part_number_canonical, pp.part_number_extracted, '') AS parent_pn
+FROM parts p
+JOIN documents d ON d.id = p.document_id
+LEFT JOIN parts pp ON pp.id = p.parent_part_id
+WHERE d.pdf_name = ? AND p.page_num = ? AND UPPER(coalesce(p.part_number_cell, p.part_number_canonical, p.part_number_extracted, '')) = ?
+ORDER BY p.id
+"""
+
+
+class _DbRow(NamedTuple):
+    """A fetched part row with the fields the checks compare, normalized once at fetch time."""
+
+    fig_item: str
+    fig_item_norm: str
+    nom_level: int
+    figure_code: str
+    parent_pn: str
+
+
+def _db_row(row: sqlite3.Row) -> _DbRow:
+    fig_item = _fig_item_display(row["fig_item_raw"], row["fig_item_no"], int(row["not_illustrated"] or 0)).strip()
+    return _DbRow(
+        fig_item=fig_item,
+        fig_item_norm=_norm_fig_item_token(fig_item),
+        nom_level=int(row["nom_level"] or 0),
+        figure_code=str(row["figure_code"] or "").strip().upper(),
+        parent_pn=str(row["parent_pn"] or "").strip().upper(),
+    )
+
+
 def _find_rows(
     conn: sqlite3.Connection,
     pdf_name: str,
     page_num: int,
     part_number: str,
-) -> list[sqlite3.Row]:
-    return conn.execute(
-        """
-        SELECT
-          p.id,
-          d.pdf_name AS source_pdf,
-          p.page_num,
-          p.figure_code,
-          p.fig_item_raw,
-          p.fig_item_no,
-          p.not_illustrated,
-          p.part_number_cell,
-          p.part_number_canonical,
-          p.part_number_extracted,
-          p.nom_level,
-          p.parent_part_id
-        FROM parts p
-        JOIN documents d ON d.id = p.document_id
-        WHERE d.pdf_name = ? AND p.page_num = ? AND UPPER(coalesce(p.part_number_cell, p.part_number_canonical, p.part_number_extracted, '')) = ?
-        ORDER BY p.id
-        """,
-        (pdf_name, int(page_num), part_number.strip().upper()),
-    ).fetchall()
-
-
-def _parent_pn(conn: sqlite3.Connection, parent_id: int | None) -> str:
-    if not parent_id:
-        return ""
-    row = conn.execute(
-        """
-        SELECT coalesce(part_number_cell, part_number_canonical, part_number_extracted, '') AS pn
-        FROM parts
-        WHERE id = ?
-        """,
-        (int(parent_id),),
-    ).fetchone()
-    if not row:
-        return ""
-    return str(row["pn"] or "").strip().upper()
-
-
-def check(db_path: Path, samples_path: Path) -> int:
-    samples = json.loads(samples_path.read_text(encoding="utf-8"))
+) -> list[_DbRow]:
+    cur = conn.execute(_FIND_ROWS_SQL, (pdf_name, int(page_num), part_number.strip().upper()))
+    return [_db_row(r) for r in cur]
+
+
+class _PdfTruth:
+    """
+    One PDF plus per-page caches (table columns, footer meta, extracted rows) shared by its samples.
+    Pages found in the persistent TruthCache skip MuPDF; the document is only opened on a miss.
+    """
+
+    def __init__(self, pdf_path: Path, stack: ExitStack, cache: TruthCache | None) -> None:
+        self.pdf_path = pdf_path
+        self._stack = stack
+        self._cache = cache
+        self._doc: fitz.Document | None = None
+        self.columns_by_page: dict[int, TableColumns] = {}
+        self.meta_by_page: dict[int, FooterMeta] = {}
+        self.rows_by_page: dict[int, list[dict[str, Any]]] = {}
+
+    @property
+    def doc(self) -> fitz.Document:
+        if self._doc is None:
+            self._doc = self._stack.enter_context(fitz.open(str(self.pdf_path)))
+        return self._doc
+
+    def columns(self, page_num: int) -> TableColumns:
+        columns = self.columns_by_page.get(page_num)
+        if columns is None:
+            words = self._cache.table_words(self.pdf_path, page_num) if self._cache else None
+            if words is None:
+                words = table_words_on_page(self.doc[page_num - 1])
+                if self._cache:
+                    self._cache.put_table_words(self.pdf_path, page_num, words)
+            columns = split_table_columns(words)
+            self.columns_by_page[page_num] = columns
+        return columns
+
+    def meta(self, page_num: int) -> FooterMeta:
+        meta = self.meta_by_page.get(page_num)
+        if meta is None:
+            meta = self._cache.footer_meta(self.pdf_path, page_num) if self._cache else None
+            if meta is None:
+                meta = parse_footer_meta_from_page(self.doc[page_num - 1])
+                if self._cache:
+                    self._cache.put_footer_meta(self.pdf_path, page_num, meta)
+            self.meta_by_page[page_num] = meta
+        return meta
+
+    def rows(self, page_num: int) -> list[dict[str, Any]]:
+        rows = self.rows_by_page.get(page_num)
+        if rows is None:
+            rows = extract_rows_from_columns(self.columns(page_num))
+            self.rows_by_page[page_num] = rows
+        return rows
+
+    def parent(self, page_num: int, part_number: str, fig_item: str) -> dict[str, str]:
+        # fill the pages truth_parent_for_row walks (same figure_code, up to page_num) through the
+        # caches above, so it never has to extract them from the document itself
+        if 1 <= page_num <= self.doc.page_count:
+            code = (self.meta(page_num).figure_code or "").strip().upper()
+            if code:
+                for p in range(1, page_num + 1):
+                    if (self.meta(p).figure_code or "").strip().upper() == code:
+                        self.rows(p)
+        return truth_parent_for_row(
+            pdf_path=self.pdf_path,
+            page_num=page_num,
+            part_number=part_number,
+            fig_item=fig_item,
+            doc=self.doc,
+            meta_by_page=self.meta_by_page,
+            rows_by_page=self.rows_by_page,
+        )
+
+
+def _load_pdf_truth(
+    pdf_path: Path,
+    opened: dict[Path, _PdfTruth],
+    stack: ExitStack,
+    cache: TruthCache | None,
+) -> _PdfTruth:
+    truth = opened.get(pdf_path)
+    if truth is None:
+        truth = _PdfTruth(pdf_path, stack, cache)
+        opened[pdf_path] = truth
+    return truth
+
+
+def _sample_pdf_truth(
+    truth_pdf: _PdfTruth,
+    page_num: int,
+    part_number: str,
+    fig_item: str,
+    *,
+    want_meta: bool,
+    want_parent: bool,
+) -> dict[str, Any]:
+    """All PDF-truth lookups for one sample against the already open document: rows, footer meta, parent."""
+    truth_rows = find_part_rows_in_columns(truth_pdf.columns(page_num), part_number)
+    out: dict[str, Any] = {"truth_rows": truth_rows, "meta": None, "parent": None}
+    if not truth_rows:
+        return out
+    if want_meta:
+        out["meta"] = truth_pdf.meta(page_num)
+    if want_parent:
+        out["parent"] = truth_pdf.parent(page_num, part_number, fig_item)
+    return out
+
+
+def _check_sample(
+    conn: sqlite3.Connection,
+    s: dict[str, Any],
+    truth_pdfs: dict[Path, _PdfTruth],
+    pdf_stack: ExitStack,
+    truth_cache: TruthCache | None,
+) -> list[str]:
     failures: list[str] = []
-    with _open_db(db_path) as conn:
-        for s in samples:
-            name = str(s.get("name") or "")
-            pdf_name = str(s.get("pdf_name") or "")
-            page_num = int(s.get("page_num") or 0)
-            pn = str(s.get("part_number") or "").strip().upper()
-            expected = s.get("expected") or {}
-            pdf_root = Path(str(s.get("pdf_root") or "IPC/7NG"))
-            pdf_path = pdf_root / pdf_name
-
-            rows = _find_rows(conn, pdf_name, page_num, pn)
-            if not rows:
-                failures.append(f"{name}: missing row (pdf={pdf_name} page={page_num} pn={pn})")
-                continue
-
-            fig_item = s.get("fig_item")
-            if fig_item is not None:
-                fig_item = str(fig_item).strip()
-                hit = None
-                for r in rows:
-                    disp = _fig_item_display(r["fig_item_raw"], r["fig_item_no"], int(r["not_illustrated"] or 0)).strip()
-                    if disp == fig_item:
-                        hit = r
-                        break
-                if not hit:
-                    got = [
-                        _fig_item_display(r["fig_item_raw"], r["fig_item_no"], int(r["not_illustrated"] or 0)).strip()
-                        for r in rows
-                    ]
-                    failures.append(f"{name}: fig_item not found, want={fig_item!r} got={got!r}")
-                    continue
-                rows_to_check = [hit]
+    name = str(s.get("name") or "")
+    pdf_name = str(s.get("pdf_name") or "")
+    page_num = int(s.get("page_num") or 0)
+    pn = str(s.get("part_number") or "").strip().upper()
+    expected = s.get("expected") or {}
+    pdf_root = Path(str(s.get("pdf_root") or "IPC/7NG"))
+    pdf_path = pdf_root / pdf_name
+
+    rows = _find_rows(conn, pdf_name, page_num, pn)
+    if not rows:
+        failures.append(f"{name}: missing row (pdf={pdf_name} page={page_num} pn={pn})")
+        return failures
+
+    fig_item = s.get("fig_item")
+    if fig_item is not None:
+        fig_item = str(fig_item).strip()
+        hit = next((r for r in rows if r.fig_item == fig_item), None)
+        if hit is None:
+            got = [r.fig_item for r in rows]
+            failures.append(f"{name}: fig_item not found, want={fig_item!r} got={got!r}")
+            return failures
+        rows_to_check = [hit]
+    else:
+        rows_to_check = rows
+
+    fig_item_set = s.get("fig_item_set")
+    if fig_item_set is not None:
+        want = {_norm_fig_item_token(str(x)) for x in fig_item_set}
+        got2 = {r.fig_item_norm for r in rows}
+        if not want.issubset(got2):
+            failures.append(f"{name}: fig_item_set mismatch, want={sorted(want)!r} got={sorted(got2)!r}")
+
+    min_nom_level = expected.get("min_nom_level")
+    if min_nom_level is not None:
+        want_level = int(min_nom_level)
+        got_level = max(r.nom_level for r in rows_to_check)
+        if got_level < want_level:
+            failures.append(f"{name}: nom_level too small, want>={want_level} got={got_level}")
+
+    exp_fig = expected.get("figure_code")
+    if exp_fig is not None:
+        want_fig = str(exp_fig).strip().upper()
+        got_fig = rows_to_check[0].figure_code
+        if got_fig != want_fig:
+            failures.append(f"{name}: figure_code mismatch, want={want_fig} got={got_fig}")
+
+    exp_parent = expected.get("parent_part_number")
+    if exp_parent is not None:
+        want_parent = str(exp_parent).strip().upper()
+        got_parent = rows_to_check[0].parent_pn
+        if got_parent != want_parent:
+            failures.append(f"{name}: parent mismatch, want={want_parent} got={got_parent}")
+
+    exp_count = expected.get("count_at_least")
+    if exp_count is not None:
+        want_n = int(exp_count)
+        if len(rows) < want_n:
+            failures.append(f"{name}: row count too small, want>={want_n} got={len(rows)}")
+
+    if expected.get("pdf_truth") == 1:
+        if not pdf_path.exists():
+            failures.append(f"{name}: pdf not found for truth check: {pdf_path}")
+        else:
+            want_fig_truth = expected.get("figure_code")
+            truth_info = _sample_pdf_truth(
+                _load_pdf_truth(pdf_path, truth_pdfs, pdf_stack, truth_cache),
+                page_num,
+                pn,
+                str(fig_item or ""),
+                want_meta=want_fig_truth is not None,
+                want_parent=expected.get("pdf_truth_parent") == 1,
+            )
+            truth_rows = truth_info["truth_rows"]
+            if not truth_rows:
+                failures.append(f"{name}: pdf truth missing (pdf={pdf_path} page={page_num} pn={pn})")
             else:
-                rows_to_check = rows
-
-            fig_item_set = s.get("fig_item_set")
-            if fig_item_set is not None:
-                want = {_norm_fig_item_token(str(x)) for x in fig_item_set}
-                got_set = {
-                    _fig_item_display(r["fig_item_raw"], r["fig_item_no"], int(r["not_illustrated"] or 0)).strip()
-                    for r in rows
-                }
-                got2 = {_norm_fig_item_token(g) for g in got_set}
-                if not want.issubset(got2):
-                    failures.append(f"{name}: fig_item_set mismatch, want={sorted(want)!r} got={sorted(got2)!r}")
-
-            min_nom_level = expected.get("min_nom_level")
-            if min_nom_level is not None:
-                want_level = int(min_nom_level)
-                got_level = max(int(r["nom_level"] or 0) for r in rows_to_check)
-                if got_level < want_level:
-                    failures.append(f"{name}: nom_level too small, want>={want_level} got={got_level}")
-
-            exp_fig = expected.get("figure_code")
-            if exp_fig is not None:
-                want_fig = str(exp_fig).strip().upper()
-                got_fig = str(rows_to_check[0]["figure_code"] or "").strip().upper()
-                if got_fig != want_fig:
-                    failures.append(f"{name}: figure_code mismatch, want={want_fig} got={got_fig}")
-
-            exp_parent = expected.get("parent_part_number")
-            if exp_parent is not None:
-                want_parent = str(exp_parent).strip().upper()
-                got_parent = _parent_pn(conn, rows_to_check[0]["parent_part_id"])
-                if got_parent != want_parent:
-                    failures.append(f"{name}: parent mismatch, want={want_parent} got={got_parent}")
-
-            exp_count = expected.get("count_at_least")
-            if exp_count is not None:
-                want_n = int(exp_count)
-                if len(rows) < want_n:
-                    failures.append(f"{name}: row count too small, want>={want_n} got={len(rows)}")
-
-            if expected.get("pdf_truth") == 1:
-                if not pdf_path.exists():
-                    failures.append(f"{name}: pdf not found for truth check: {pdf_path}")
-                else:
-                    truth_rows = find_part_rows_on_page(pdf_path, page_num, pn)
-                    if not truth_rows:
-                        failures.append(f"{name}: pdf truth missing (pdf={pdf_path} page={page_num} pn={pn})")
-                    else:
-                        want_set = expected.get("fig_item_set")
-                        if want_set is not None:
-                            want = {_norm_fig_item_token(str(x)) for x in want_set}
-                            truth_fig_set = {str(r.get('fig_item') or '').strip() for r in truth_rows}
-                            truth_fig_set = {_norm_fig_item_token(g) for g in truth_fig_set}
-                            if not want.issubset(truth_fig_set):
-                                failures.append(
-                                    f"{name}: pdf truth fig_item_set mismatch, want={sorted(want)!r} got={sorted(truth_fig_set)!r}"
-                                )
-
-                        want_min = expected.get("min_nom_level")
-                        if want_min is not None:
-                            got_max = max(int(r.get('nom_level') or 0) for r in truth_rows)
-                            if got_max < int(want_min):
-                                failures.append(
-                                    f"{name}: pdf truth nom_level too small, want>={int(want_min)} got={got_max}"
-                                )
-
-                        want_fig_truth = expected.get("figure_code")
-                        if want_fig_truth is not None:
-                            import fitz  # PyMuPDF
-
-                            with fitz.open(str(pdf_path)) as doc:
-                                meta = parse_footer_meta_from_page(doc[page_num - 1])
-                            if (meta.figure_code or "").strip().upper() != str(want_fig_truth).strip().upper():
-                                failures.append(
-                                    f"{name}: pdf truth footer figure_code mismatch, want={str(want_fig_truth).strip().upper()} got={(meta.figure_code or '').strip().upper()}"
-                                )
-
-                        if expected.get("pdf_truth_parent") == 1:
-                            # Compare DB parent against PDF-truth derived parent within the same footer figure_code.
-                            truth = truth_parent_for_row(
-                                pdf_path=pdf_path,
-                                page_num=page_num,
-                                part_number=pn,
-                                fig_item=str(fig_item or ""),
-                            )
-                            want_parent = (truth.get("parent") or "").strip().upper()
-                            got_parent = _parent_pn(conn, rows_to_check[0]["parent_part_id"])
-                            if want_parent and got_parent != want_parent:
-                                failures.append(f"{name}: pdf truth parent mismatch, want={want_parent} got={got_parent}")
+                want_set = expected.get("fig_item_set")
+                if want_set is not None:
+                    want = {_norm_fig_item_token(str(x)) for x in want_set}
+                    truth_fig_set = {str(r.get('fig_item') or '').strip() for r in truth_rows}
+                    truth_fig_set = {_norm_fig_item_token(g) for g in truth_fig_set}
+                    if not want.issubset(truth_fig_set):
+                        failures.append(
+                            f"{name}: pdf truth fig_item_set mismatch, want={sorted(want)!r} got={sorted(truth_fig_set)!r}"
+                        )
+
+                want_min = expected.get("min_nom_level")
+                if want_min is not None:
+                    got_max = max(int(r.get('nom_level') or 0) for r in truth_rows)
+                    if got_max < int(want_min):
+                        failures.append(
+                            f"{name}: pdf truth nom_level too small, want>={int(want_min)} got={got_max}"
+                        )
+
+                if want_fig_truth is not None:
+                    meta = truth_info["meta"]
+                    if (meta.figure_code or "").strip().upper() != str(want_fig_truth).strip().upper():
+                        failures.append(
+                            f"{name}: pdf truth footer figure_code mismatch, want={str(want_fig_truth).strip().upper()} got={(meta.figure_code or '').strip().upper()}"
+                        )
+
+                if expected.get("pdf_truth_parent") == 1:
+                    # Compare DB parent against PDF-truth derived parent within the same footer figure_code.
+                    truth = truth_info["parent"]
+                    want_parent = (truth.get("parent") or "").strip().upper()
+                    got_parent = rows_to_check[0].parent_pn
+                    if want_parent and got_parent != want_parent:
+                        failures.append(f"{name}: pdf truth parent mismatch, want={want_parent} got={got_parent}")
+    return failures
+
+
+def _run_pdf_group(
+    db_path: Path,
+    group: list[tuple[int, dict[str, Any]]],
+    truth_cache_path: Path | None = None,
+) -> list[tuple[int, list[str]]]:
+    """Check the samples of one PDF with private sqlite connections and fitz document (safe in a worker process)."""
+    results: list[tuple[int, list[str]]] = []
+    # samples on the same PDF / page share one fitz.open and one get_text("words")
+    truth_pdfs: dict[Path, _PdfTruth] = {}
+    with _open_db(db_path) as conn, ExitStack() as pdf_stack:
+        truth_cache = TruthCache.open(truth_cache_path) if truth_cache_path is not None else None
+        if truth_cache is not None:
+            pdf_stack.enter_context(truth_cache)
+        for idx, s in group:
+            results.append((idx, _check_sample(conn, s, truth_pdfs, pdf_stack, truth_cache)))
+    return results
+
+
+def _group_by_pdf(samples: list[dict[str, Any]]) -> list[list[tuple[int, dict[str, Any]]]]:
+    groups: dict[str, list[tuple[int, dict[str, Any]]]] = {}
+    for idx, s in enumerate(samples):
+        groups.setdefault(str(s.get("pdf_name") or ""), []).append((idx, s))
+    return list(groups.values())
+
+
+def check(
+    db_path: Path,
+    samples_path: Path,
+    *,
+    jobs: int = 0,
+    truth_cache_path: Path | None = DEFAULT_TRUTH_CACHE,
+) -> int:
+    samples = json.loads(samples_path.read_text(encoding="utf-8"))
+    groups = _group_by_pdf(samples)
+    workers = min(jobs if jobs > 0 else (os.cpu_count() or 1), len(groups))
+    by_index: dict[int, list[str]] = {}
+    if workers <= 1:
+        for group in groups:
+            by_index.update(_run_pdf_group(db_path, group, truth_cache_path))
+    else:
+        # PDF groups are independent and CPU-bound in MuPDF; each worker opens its own DB and documents.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for results in pool.map(_run_pdf_group, repeat(db_path), groups, repeat(truth_cache_path)):
+                by_index.update(results)
+    # report in sample-file order regardless of how the groups were scheduled
+    failures = [f for idx in sorted(by_index) for f in by_index[idx]]
 
     if failures:
         print("[FAIL]")
@@ -236,8 +424,12 @@ def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--db", type=str, default="data/ipc.sqlite")
     parser.add_argument("--samples", type=str, default="data/fixtures/qa/baseline/qa_samples.json")
+    parser.add_argument("--jobs", type=int, default=0, help="worker processes for per-PDF checks (0 = CPU count, 1 = serial)")
+    parser.add_argument("--truth-cache", type=str, default=str(DEFAULT_TRUTH_CACHE), help="sqlite sidecar for PDF truth")
+    parser.add_argument("--no-cache", action="store_true", help="always re-extract PDF truth with MuPDF")
     args = parser.parse_args()
-    return check(Path(args.db), Path(args.samples))
+    truth_cache_path = None if args.no_cache else Path(args.truth_cache)
+    return check(Path(args.db), Path(args.samples), jobs=args.jobs, truth_cache_path=truth_cache_path)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import json
+import os
 import sqlite3
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+try:  # optional: orjson encodes large --limit sample sets far faster than the stdlib encoder
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
 
 
 def _force_utf8_stdout() -> None:
@@ -21,225 +29,395 @@ def _force_utf8_stdout() -> None:
 _force_utf8_stdout()
 
 
-def _rows_to_dicts(rows: list[sqlite3.Row]) -> list[dict[str, Any]]:
-    return [dict(r) for r in rows]
+def _count_with_samples(
+    conn: sqlite3.Connection, diff_sql: str, columns: tuple[str, ...], limit: int
+) -> tuple[int, list[dict[str, Any]]]:
+    """Run one diff query once and return (row count, first `limit` rows by source_pdf/start_page)."""
+    # A CTE referenced twice is materialized, so the count and the sample LIMIT scan both read the same
+    # intermediate instead of re-running the join. The samples come back as one JSON array built by
+    # SQLite, so no per-row sqlite3.Row / dict boxing happens on the Python side.
+    fields = ", ".join(f"'{col}', {col}" for col in columns)
+    count, raw = conn.execute(
+        f"""
+        WITH diff AS ({diff_sql})
+        SELECT
+          (SELECT count(*) FROM diff),
+          (
+            SELECT json_group_array(json_object({fields}))
+            FROM (SELECT * FROM diff ORDER BY source_pdf, start_page LIMIT :limit)
+          )
+        """,
+        {"limit": limit},
+    ).fetchone()
+    return int(count), json.loads(raw)
 
 
-def compare(*, coords_db: Path, ipc_db: Path, limit: int) -> dict[str, Any]:
-    t0 = time.time()
-    conn = sqlite3.connect(":memory:")
+# Both inputs are only read: a big page cache keeps the normalized TEMP tables and their indexes
+# resident across the comparison passes, and mmap serves the source pages without read() copies.
+_COMPARE_PRAGMAS = (
+    ("cache_size", "-262144"),
+    ("mmap_size", "1073741824"),
+    ("temp_store", "MEMORY"),
+)
+
+
+def _readonly_uri(path: Path) -> str:
+    # mode=ro rather than immutable=1: the coords DB is usually in WAL mode, and immutable would
+    # ignore frames not yet checkpointed into the main file.
+    return path.resolve().as_uri() + "?mode=ro"
+
+
+def _connect_readonly(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(_readonly_uri(path), uri=True)
     conn.row_factory = sqlite3.Row
+    for pragma, value in _COMPARE_PRAGMAS:
+        try:
+            conn.execute(f"PRAGMA {pragma}={value};")
+        except sqlite3.OperationalError:
+            pass
+    return conn
+
+
+# Normalize both DBs into tables so comparisons are stable and fast.
+#
+# key3: (source_pdf, start_page, part_number)
+# key4: (source_pdf, start_page, part_number, fig_item_text)
+#
+# start_page is converted to INTEGER here, once per build: ipc_rows.start_page is TEXT in the external
+# ipc.db (opened read-only, so its schema is not ours to migrate), and parts.page_num is already
+# INTEGER. Both key3 indexes therefore hold integer start_page keys and the joins compare them as-is.
+#
+# {temp} is "TEMP" for a per-run build and empty when materialized into the --cache-db sidecar;
+# {coords} is the schema name of the coords DB.
+_NORMALIZE_SQL = """
+CREATE {temp} TABLE coords_norm AS
+SELECT
+  p.id AS part_id,
+  d.pdf_name AS source_pdf,
+  CAST(p.page_num AS INT) AS start_page,
+  UPPER(TRIM(COALESCE(p.part_number_canonical, p.part_number_extracted, p.part_number_cell, ''))) AS part_number,
+  -- every branch is built from TRIM()med, non-empty pieces, so the result needs no outer TRIM;
+  -- an empty fig_item_no short-circuits the first two branches before raw is compared again
+  CASE
+    WHEN TRIM(COALESCE(p.fig_item_no, '')) = '' THEN TRIM(COALESCE(p.fig_item_raw, ''))
+    WHEN TRIM(COALESCE(p.fig_item_raw, '')) = '-' THEN '- ' || TRIM(p.fig_item_no)
+    WHEN TRIM(COALESCE(p.fig_item_raw, '')) <> '' THEN TRIM(p.fig_item_raw) || ' ' || TRIM(p.fig_item_no)
+    WHEN COALESCE(p.not_illustrated, 0) <> 0 THEN '- ' || TRIM(p.fig_item_no)
+    ELSE TRIM(p.fig_item_no)
+  END AS fig_item_text,
+  CAST(COALESCE(p.nom_level, 0) AS INT) AS nom_level,
+  UPPER(TRIM(COALESCE(pp.part_number_canonical, pp.part_number_extracted, pp.part_number_cell, ''))) AS parent_pn
+FROM {coords}.parts p
+JOIN {coords}.documents d ON d.id = p.document_id
+LEFT JOIN {coords}.parts pp ON pp.id = p.parent_part_id
+WHERE p.row_kind = 'part';
+
+CREATE {temp} TABLE ipc_norm AS
+SELECT
+  id AS ipc_id,
+  TRIM(source_pdf) AS source_pdf,
+  CAST(TRIM(start_page) AS INT) AS start_page,
+  UPPER(TRIM(part_number)) AS part_number,
+  TRIM(COALESCE(fig_item_text, '')) AS fig_item_text,
+  UPPER(TRIM(COALESCE(Parent_PN, ''))) AS parent_pn,
+  CAST(COALESCE(NULLIF(TRIM(IPC_Level), ''), '0') AS INT) AS ipc_level
+FROM ipc.ipc_rows;
+
+-- One covering index per side, led by key3: every join, anti-join and sample reads only these
+-- columns, so probes never hop from the index back to the table row. (WITHOUT ROWID tables keyed
+-- on the join columns would do the same, but their key columns are NOT NULL and source_pdf /
+-- start_page / part_number can be NULL here; those rows must still count as missing / extra.)
+-- key4 matches seek on the key3 prefix and check fig_item_text within the index entry.
+CREATE INDEX idx_coords_key3 ON coords_norm(source_pdf, start_page, part_number, fig_item_text, nom_level, parent_pn);
+CREATE INDEX idx_ipc_key3 ON ipc_norm(source_pdf, start_page, part_number, fig_item_text, parent_pn, ipc_level);
+
+-- PDFs present on both sides: the key4 mismatch joins only pair rows within these, so driving them
+-- from here skips every ingest-only / ipc-only PDF without probing its rows.
+CREATE {temp} TABLE common_pdfs AS
+SELECT source_pdf FROM ipc_norm
+INTERSECT
+SELECT source_pdf FROM coords_norm;
+CREATE UNIQUE INDEX idx_common_pdfs ON common_pdfs(source_pdf);
+
+-- Row-count / selectivity stats let the planner drive the anti-joins from the smaller side on
+-- skewed inputs; analysis_limit samples each index so ANALYZE stays cheap on large tables.
+PRAGMA analysis_limit = 400;
+ANALYZE coords_norm;
+ANALYZE ipc_norm;
+ANALYZE common_pdfs;
+"""
+
+# Bump when _NORMALIZE_SQL changes so existing --cache-db sidecars are rebuilt.
+_NORM_CACHE_VERSION = "8"
+
+
+def _source_stamp(path: Path) -> str:
+    # mtime/size of the DB file and of its WAL: writes to a WAL-mode DB leave the main file untouched
+    # until the next checkpoint
+    parts = [str(path.resolve())]
+    for p in (path, path.with_name(path.name + "-wal")):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        parts.append(f"{p.name}:{st.st_mtime_ns}:{st.st_size}")
+    return "|".join(parts)
+
+
+def _refresh_norm_cache(cache_db: Path, coords_db: Path, ipc_db: Path) -> bool:
+    """Materialize coords_norm / ipc_norm into cache_db unless both inputs are unchanged; True if rebuilt."""
+    stamp = {
+        "version": _NORM_CACHE_VERSION,
+        "coords": _source_stamp(coords_db),
+        "ipc": _source_stamp(ipc_db),
+    }
+    cache_db.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(cache_db.resolve().as_uri(), uri=True)
     try:
-        conn.execute("PRAGMA temp_store=MEMORY;").fetchone()
-        conn.execute("ATTACH DATABASE ? AS coords", (str(coords_db),)).fetchone()
-        conn.execute("ATTACH DATABASE ? AS ipc", (str(ipc_db),)).fetchone()
-
-        # Normalize both DBs into TEMP tables so comparisons are stable and fast.
-        #
-        # key3: (source_pdf, start_page, part_number)
-        # key4: (source_pdf, start_page, part_number, fig_item_text)
+        conn.execute("CREATE TABLE IF NOT EXISTS norm_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.commit()
+        if dict(conn.execute("SELECT key, value FROM norm_meta").fetchall()) == stamp:
+            return False
+
+        conn.execute("ATTACH DATABASE ? AS coords", (_readonly_uri(coords_db),))
+        conn.execute("ATTACH DATABASE ? AS ipc", (_readonly_uri(ipc_db),))
         conn.executescript(
-            """
-            CREATE TEMP TABLE coords_norm AS
-            SELECT
-              p.id AS part_id,
-              d.pdf_name AS source_pdf,
-              CAST(p.page_num AS INT) AS start_page,
-              UPPER(TRIM(COALESCE(p.part_number_canonical, p.part_number_extracted, p.part_number_cell, ''))) AS part_number,
-              TRIM(
-                CASE
-                  WHEN TRIM(COALESCE(p.fig_item_raw, '')) = '-' AND TRIM(COALESCE(p.fig_item_no, '')) <> '' THEN '- ' || TRIM(p.fig_item_no)
-                  WHEN TRIM(COALESCE(p.fig_item_raw, '')) <> '' AND TRIM(COALESCE(p.fig_item_no, '')) <> '' THEN TRIM(p.fig_item_raw) || ' ' || TRIM(p.fig_item_no)
-                  WHEN TRIM(COALESCE(p.fig_item_raw, '')) <> '' THEN TRIM(p.fig_item_raw)
-                  WHEN TRIM(COALESCE(p.fig_item_no, '')) <> '' THEN CASE WHEN COALESCE(p.not_illustrated, 0) <> 0 THEN '- ' || TRIM(p.fig_item_no) ELSE TRIM(p.fig_item_no) END
-                  ELSE ''
-                END
-              ) AS fig_item_text,
-              CAST(COALESCE(p.nom_level, 0) AS INT) AS nom_level,
-              UPPER(TRIM(COALESCE(pp.part_number_canonical, pp.part_number_extracted, pp.part_number_cell, ''))) AS parent_pn
-            FROM coords.parts p
-            JOIN coords.documents d ON d.id = p.document_id
-            LEFT JOIN coords.parts pp ON pp.id = p.parent_part_id
-            WHERE p.row_kind = 'part';
-
-            CREATE TEMP TABLE ipc_norm AS
-            SELECT
-              id AS ipc_id,
-              TRIM(source_pdf) AS source_pdf,
-              CAST(TRIM(start_page) AS INT) AS start_page,
-              UPPER(TRIM(part_number)) AS part_number,
-              TRIM(COALESCE(fig_item_text, '')) AS fig_item_text,
-              UPPER(TRIM(COALESCE(Parent_PN, ''))) AS parent_pn,
-              CAST(COALESCE(NULLIF(TRIM(IPC_Level), ''), '0') AS INT) AS ipc_level
-            FROM ipc.ipc_rows;
-
-            CREATE INDEX idx_coords_key3 ON coords_norm(source_pdf, start_page, part_number);
-            CREATE INDEX idx_ipc_key3 ON ipc_norm(source_pdf, start_page, part_number);
-            CREATE INDEX idx_coords_key4 ON coords_norm(source_pdf, start_page, part_number, fig_item_text);
-            CREATE INDEX idx_ipc_key4 ON ipc_norm(source_pdf, start_page, part_number, fig_item_text);
-            """
+            "BEGIN;\n"
+            "DELETE FROM norm_meta;\n"
+            "DROP TABLE IF EXISTS coords_norm;\n"
+            "DROP TABLE IF EXISTS ipc_norm;\n"
+            "DROP TABLE IF EXISTS common_pdfs;\n"
+            + _NORMALIZE_SQL.format(temp="", coords="coords")
+            + "COMMIT;\n"
         )
+        conn.executemany("INSERT INTO norm_meta (key, value) VALUES (?, ?)", stamp.items())
+        conn.commit()
+        return True
+    finally:
+        conn.close()
 
-        ipc_total = int(conn.execute("SELECT count(*) AS n FROM ipc_norm").fetchone()["n"])
-        coords_total = int(conn.execute("SELECT count(*) AS n FROM coords_norm").fetchone()["n"])
 
-        missing_key3 = int(
-            conn.execute(
-                """
-                SELECT count(*) AS n
-                FROM ipc_norm i
-                LEFT JOIN coords_norm c
-                  ON c.source_pdf = i.source_pdf
-                 AND c.start_page = i.start_page
-                 AND c.part_number = i.part_number
-                WHERE c.part_number IS NULL
-                """
-            ).fetchone()["n"]
+# Diff categories reported with a count plus samples: name -> (diff query, sample columns).
+# missing / extra are anti-joins written as NOT EXISTS: each probe is an index-only semi-join
+# that stops at the first match instead of producing every matching pair.
+_SAMPLED_DIFFS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "missing_key3": (
+        """
+        SELECT i.source_pdf, i.start_page, i.fig_item_text, i.part_number, i.parent_pn, i.ipc_level
+        FROM ipc_norm i
+        WHERE NOT EXISTS (
+          SELECT 1 FROM coords_norm c
+          WHERE c.source_pdf = i.source_pdf
+            AND c.start_page = i.start_page
+            AND c.part_number = i.part_number
         )
-        extra_key3 = int(
-            conn.execute(
-                """
-                SELECT count(*) AS n
-                FROM coords_norm c
-                LEFT JOIN ipc_norm i
-                  ON c.source_pdf = i.source_pdf
-                 AND c.start_page = i.start_page
-                 AND c.part_number = i.part_number
-                WHERE i.part_number IS NULL
-                """
-            ).fetchone()["n"]
-        )
-        missing_key4 = int(
-            conn.execute(
-                """
-                SELECT count(*) AS n
-                FROM ipc_norm i
-                LEFT JOIN coords_norm c
-                  ON c.source_pdf = i.source_pdf
-                 AND c.start_page = i.start_page
-                 AND c.part_number = i.part_number
-                 AND c.fig_item_text = i.fig_item_text
-                WHERE c.part_id IS NULL
-                """
-            ).fetchone()["n"]
-        )
-        extra_key4 = int(
-            conn.execute(
-                """
-                SELECT count(*) AS n
-                FROM coords_norm c
-                LEFT JOIN ipc_norm i
-                  ON c.source_pdf = i.source_pdf
-                 AND c.start_page = i.start_page
-                 AND c.part_number = i.part_number
-                 AND c.fig_item_text = i.fig_item_text
-                WHERE i.ipc_id IS NULL
-                """
-            ).fetchone()["n"]
+        """,
+        ("source_pdf", "start_page", "fig_item_text", "part_number", "parent_pn", "ipc_level"),
+    ),
+    "extra_key3": (
+        """
+        SELECT c.source_pdf, c.start_page, c.fig_item_text, c.part_number, c.parent_pn, c.nom_level
+        FROM coords_norm c
+        WHERE NOT EXISTS (
+          SELECT 1 FROM ipc_norm i
+          WHERE i.source_pdf = c.source_pdf
+            AND i.start_page = c.start_page
+            AND i.part_number = c.part_number
         )
+        """,
+        ("source_pdf", "start_page", "fig_item_text", "part_number", "parent_pn", "nom_level"),
+    ),
+    "parent_mismatch_key4": (
+        """
+        SELECT
+          i.source_pdf, i.start_page, i.fig_item_text, i.part_number,
+          i.parent_pn AS ipc_parent_pn,
+          c.parent_pn AS coords_parent_pn
+        FROM common_pdfs cp
+        JOIN ipc_norm i ON i.source_pdf = cp.source_pdf
+        JOIN coords_norm c
+          ON c.source_pdf = i.source_pdf
+         AND c.start_page = i.start_page
+         AND c.part_number = i.part_number
+         AND c.fig_item_text = i.fig_item_text
+        WHERE i.parent_pn NOT IN ('', 'MAIN') AND c.parent_pn <> i.parent_pn
+        """,
+        ("source_pdf", "start_page", "fig_item_text", "part_number", "ipc_parent_pn", "coords_parent_pn"),
+    ),
+    "level_mismatch_key4": (
+        """
+        SELECT
+          i.source_pdf, i.start_page, i.fig_item_text, i.part_number,
+          i.ipc_level AS ipc_level,
+          c.nom_level AS coords_level
+        FROM common_pdfs cp
+        JOIN ipc_norm i ON i.source_pdf = cp.source_pdf
+        JOIN coords_norm c
+          ON c.source_pdf = i.source_pdf
+         AND c.start_page = i.start_page
+         AND c.part_number = i.part_number
+         AND c.fig_item_text = i.fig_item_text
+        WHERE i.ipc_level <> c.nom_level
+        """,
+        ("source_pdf", "start_page", "fig_item_text", "part_number", "ipc_level", "coords_level"),
+    ),
+}
 
-        missing_key3_samples = _rows_to_dicts(
-            conn.execute(
-                """
-                SELECT i.source_pdf, i.start_page, i.fig_item_text, i.part_number, i.parent_pn, i.ipc_level
-                FROM ipc_norm i
-                LEFT JOIN coords_norm c
-                  ON c.source_pdf = i.source_pdf
-                 AND c.start_page = i.start_page
-                 AND c.part_number = i.part_number
-                WHERE c.part_number IS NULL
-                ORDER BY i.source_pdf, i.start_page
-                LIMIT :limit
-                """,
-                {"limit": limit},
-            ).fetchall()
-        )
-        extra_key3_samples = _rows_to_dicts(
-            conn.execute(
-                """
-                SELECT c.source_pdf, c.start_page, c.fig_item_text, c.part_number, c.parent_pn, c.nom_level
-                FROM coords_norm c
-                LEFT JOIN ipc_norm i
-                  ON i.source_pdf = c.source_pdf
-                 AND i.start_page = c.start_page
-                 AND i.part_number = c.part_number
-                WHERE i.part_number IS NULL
-                ORDER BY c.source_pdf, c.start_page
-                LIMIT :limit
-                """,
-                {"limit": limit},
-            ).fetchall()
-        )
+# key4 missing / extra are reported as counts only
+_KEY4_COUNTS_SQL = """
+SELECT
+  (
+    SELECT count(*)
+    FROM ipc_norm i
+    WHERE NOT EXISTS (
+      SELECT 1 FROM coords_norm c
+      WHERE c.source_pdf = i.source_pdf
+        AND c.start_page = i.start_page
+        AND c.part_number = i.part_number
+        AND c.fig_item_text = i.fig_item_text
+    )
+  ) AS missing,
+  (
+    SELECT count(*)
+    FROM coords_norm c
+    WHERE NOT EXISTS (
+      SELECT 1 FROM ipc_norm i
+      WHERE i.source_pdf = c.source_pdf
+        AND i.start_page = c.start_page
+        AND i.part_number = c.part_number
+        AND i.fig_item_text = c.fig_item_text
+    )
+  ) AS extra
+"""
 
-        parent_mismatch_key4 = int(
-            conn.execute(
-                """
-                SELECT count(*) AS n
-                FROM ipc_norm i
-                JOIN coords_norm c
-                  ON c.source_pdf = i.source_pdf
-                 AND c.start_page = i.start_page
-                 AND c.part_number = i.part_number
-                 AND c.fig_item_text = i.fig_item_text
-                WHERE i.parent_pn NOT IN ('', 'MAIN') AND c.parent_pn <> i.parent_pn
-                """
-            ).fetchone()["n"]
-        )
-        parent_mismatch_key4_samples = _rows_to_dicts(
-            conn.execute(
-                """
-                SELECT
-                  i.source_pdf, i.start_page, i.fig_item_text, i.part_number,
-                  i.parent_pn AS ipc_parent_pn,
-                  c.parent_pn AS coords_parent_pn
-                FROM ipc_norm i
-                JOIN coords_norm c
-                  ON c.source_pdf = i.source_pdf
-                 AND c.start_page = i.start_page
-                 AND c.part_number = i.part_number
-                 AND c.fig_item_text = i.fig_item_text
-                WHERE i.parent_pn NOT IN ('', 'MAIN') AND c.parent_pn <> i.parent_pn
-                ORDER BY i.source_pdf, i.start_page
-                LIMIT :limit
-                """,
-                {"limit": limit},
-            ).fetchall()
-        )
 
-        level_mismatch_key4 = int(
-            conn.execute(
-                """
-                SELECT count(*) AS n
-                FROM ipc_norm i
-                JOIN coords_norm c
-                  ON c.source_pdf = i.source_pdf
-                 AND c.start_page = i.start_page
-                 AND c.part_number = i.part_number
-                 AND c.fig_item_text = i.fig_item_text
-                WHERE i.ipc_level <> c.nom_level
-                """
-            ).fetchone()["n"]
-        )
-        level_mismatch_key4_samples = _rows_to_dicts(
-            conn.execute(
-                """
-                SELECT
-                  i.source_pdf, i.start_page, i.fig_item_text, i.part_number,
-                  i.ipc_level AS ipc_level,
-                  c.nom_level AS coords_level
-                FROM ipc_norm i
-                JOIN coords_norm c
-                  ON c.source_pdf = i.source_pdf
-                 AND c.start_page = i.start_page
-                 AND c.part_number = i.part_number
-                 AND c.fig_item_text = i.fig_item_text
-                WHERE i.ipc_level <> c.nom_level
-                ORDER BY i.source_pdf, i.start_page
-                LIMIT :limit
-                """,
-                {"limit": limit},
-            ).fetchall()
-        )
+def _key4_counts(conn: sqlite3.Connection) -> tuple[int, int]:
+    row = conn.execute(_KEY4_COUNTS_SQL).fetchone()
+    return int(row["missing"]), int(row["extra"])
+
+
+def _run_on_own_connection(path: Path, task: Callable[[sqlite3.Connection], Any]) -> Any:
+    conn = _connect_readonly(path)
+    try:
+        return task(conn)
+    finally:
+        conn.close()
+
+
+def _compare_sqlite(conn: sqlite3.Connection, limit: int, *, cache_db: Path | None, jobs: int) -> dict[str, Any]:
+    """Per-category count and samples computed by SQL index probes over the normalized tables."""
+    tasks: dict[str, Callable[[sqlite3.Connection], Any]] = {
+        name: functools.partial(_count_with_samples, diff_sql=diff_sql, columns=columns, limit=limit)
+        for name, (diff_sql, columns) in _SAMPLED_DIFFS.items()
+    }
+    tasks["key4_counts"] = _key4_counts
+    workers = min(max(1, jobs), len(tasks))
+    if cache_db is not None and workers > 1:
+        # each category reads the sidecar on its own read-only connection; sqlite releases the GIL
+        # while stepping, so the threads run concurrently (TEMP tables could not be shared this way)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = {name: ex.submit(_run_on_own_connection, cache_db, task) for name, task in tasks.items()}
+            results = {name: fut.result() for name, fut in futures.items()}
+    else:
+        results = {name: task(conn) for name, task in tasks.items()}
+    return results
+
+
+# Columns the polars engine loads from the normalized tables, with explicit dtypes so an all-NULL column
+# cannot be inferred as a Null dtype that refuses to join.
+_POLARS_COORDS_SCHEMA = {
+    "source_pdf": "String",
+    "start_page": "Int64",
+    "part_number": "String",
+    "fig_item_text": "String",
+    "parent_pn": "String",
+    "nom_level": "Int64",
+}
+_POLARS_IPC_SCHEMA = {
+    "source_pdf": "String",
+    "start_page": "Int64",
+    "part_number": "String",
+    "fig_item_text": "String",
+    "parent_pn": "String",
+    "ipc_level": "Int64",
+}
+
+
+def _compare_polars(conn: sqlite3.Connection, limit: int) -> dict[str, Any]:
+    """Same results as the SQL tasks, computed with vectorized hash joins over both tables loaded once."""
+    import polars as pl  # optional: only needed for --engine polars
+
+    def load(table: str, schema: dict[str, str]) -> Any:
+        cur = conn.cursor()
+        cur.row_factory = None
+        rows = cur.execute(f"SELECT {', '.join(schema)} FROM {table}").fetchall()
+        return pl.DataFrame(rows, schema={col: getattr(pl, dtype) for col, dtype in schema.items()}, orient="row")
+
+    def sampled(diff: Any, *columns: Any) -> tuple[int, list[dict[str, Any]]]:
+        # SQL ORDER BY puts NULLs first, which is also polars' default
+        samples = diff.select(columns).sort(["source_pdf", "start_page"], maintain_order=True).head(limit)
+        return diff.height, samples.to_dicts()
+
+    coords = load("coords_norm", _POLARS_COORDS_SCHEMA)
+    ipc = load("ipc_norm", _POLARS_IPC_SCHEMA)
+    key3 = ["source_pdf", "start_page", "part_number"]
+    key4 = [*key3, "fig_item_text"]
+    base = ("source_pdf", "start_page", "fig_item_text", "part_number")
+
+    # NULL keys never match, as in SQL (polars joins default to nulls_equal=False)
+    pairs = ipc.join(coords, on=key4, how="inner", suffix="_coords")
+    parent_mismatch = pairs.filter(
+        ~pl.col("parent_pn").is_in(["", "MAIN"]) & (pl.col("parent_pn_coords") != pl.col("parent_pn"))
+    )
+    level_mismatch = pairs.filter(pl.col("ipc_level") != pl.col("nom_level"))
+    return {
+        "missing_key3": sampled(ipc.join(coords, on=key3, how="anti"), *base, "parent_pn", "ipc_level"),
+        "extra_key3": sampled(coords.join(ipc, on=key3, how="anti"), *base, "parent_pn", "nom_level"),
+        "key4_counts": (ipc.join(coords, on=key4, how="anti").height, coords.join(ipc, on=key4, how="anti").height),
+        "parent_mismatch_key4": sampled(
+            parent_mismatch,
+            *base,
+            pl.col("parent_pn").alias("ipc_parent_pn"),
+            pl.col("parent_pn_coords").alias("coords_parent_pn"),
+        ),
+        "level_mismatch_key4": sampled(level_mismatch, *base, "ipc_level", pl.col("nom_level").alias("coords_level")),
+    }
+
+
+def compare(
+    *,
+    coords_db: Path,
+    ipc_db: Path,
+    limit: int,
+    cache_db: Path | None = None,
+    jobs: int = 1,
+    engine: str = "sqlite",
+) -> dict[str, Any]:
+    t0 = time.time()
+    if cache_db is not None:
+        # compare against the materialized sidecar; normalization only reruns when an input changed
+        _refresh_norm_cache(cache_db, coords_db, ipc_db)
+        conn = _connect_readonly(cache_db)
+    else:
+        conn = _connect_readonly(coords_db)
+    try:
+        if cache_db is None:
+            conn.execute("ATTACH DATABASE ? AS ipc", (_readonly_uri(ipc_db),))
+            conn.executescript(_NORMALIZE_SQL.format(temp="TEMP", coords="main"))
+
+        ipc_total = int(conn.execute("SELECT count(*) AS n FROM ipc_norm").fetchone()["n"])
+        coords_total = int(conn.execute("SELECT count(*) AS n FROM coords_norm").fetchone()["n"])
+
+        if engine == "polars":
+            results = _compare_polars(conn, limit)
+        else:
+            results = _compare_sqlite(conn, limit, cache_db=cache_db, jobs=jobs)
+
+        missing_key3, missing_key3_samples = results["missing_key3"]
+        extra_key3, extra_key3_samples = results["extra_key3"]
+        missing_key4, extra_key4 = results["key4_counts"]
+        parent_mismatch_key4, parent_mismatch_key4_samples = results["parent_mismatch_key4"]
+        level_mismatch_key4, level_mismatch_key4_samples = results["level_mismatch_key4"]
 
         elapsed_ms = int((time.time() - t0) * 1000)
         return {
@@ -269,12 +447,31 @@ def compare(*, coords_db: Path, ipc_db: Path, limit: int) -> dict[str, Any]:
         conn.close()
 
 
+def _write_report(output: Path, report: dict[str, Any]) -> None:
+    if orjson is not None:
+        # same bytes as the stdlib call below: 2-space indent, UTF-8, non-ASCII kept as-is
+        output.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        return
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--coords-db", type=str, default="data/ipc.sqlite")
     parser.add_argument("--ipc-db", type=str, default="ipc.db")
     parser.add_argument("--limit", type=int, default=30)
     parser.add_argument("--output", type=str, default="tmp/compare_ipc_vs_coords.json")
+    parser.add_argument("--cache-db", type=str, default="tmp/compare_cache.sqlite", help="sidecar with the normalized tables")
+    parser.add_argument("--no-cache", action="store_true", help="normalize into TEMP tables on every run")
+    parser.add_argument(
+        "--engine",
+        choices=("sqlite", "polars"),
+        default="sqlite",
+        help="compute the diffs with SQL index probes, or with polars hash joins (large corpora; needs polars)",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=0, help="threads for the diff categories (0 = CPU count, 1 = serial; needs the cache)"
+    )
     args = parser.parse_args()
 
     coords_db = Path(args.coords_db)
@@ -288,9 +485,18 @@ def main() -> int:
         print(f"[ERR] ipc db not found: {ipc_db}")
         return 2
 
-    report = compare(coords_db=coords_db, ipc_db=ipc_db, limit=max(1, int(args.limit)))
+    cache_db = None if args.no_cache else Path(args.cache_db)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    report = compare(
+        coords_db=coords_db,
+        ipc_db=ipc_db,
+        limit=max(1, int(args.limit)),
+        cache_db=cache_db,
+        jobs=jobs,
+        engine=args.engine,
+    )
     output.parent.mkdir(parents=True, exist_ok=True)
-    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    _write_report(output, report)
 
     totals = report["totals"]
     print("[OK] compare done")
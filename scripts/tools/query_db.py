@@ -18,92 +18,131 @@ def _force_utf8_stdout() -> None:
 _force_utf8_stdout()
 
 
+_PART_ROWS_SQL = """
+SELECT
+  p.id,
+  d.pdf_name AS source_pdf,
+  p.page_num,
+  p.figure_code,
+  p.fig_item_raw,
+  p.fig_item_no,
+  p.not_illustrated,
+  p.part_number_cell,
+  p.part_number_extracted,
+  p.part_number_canonical,
+  p.pn_corrected,
+  p.pn_method,
+  p.pn_needs_review,
+  p.correction_note,
+  p.row_kind,
+  p.nomenclature,
+  p.effectivity,
+  p.units_per_assy
+FROM parts p
+JOIN documents d ON d.id = p.document_id
+LEFT JOIN aliases a ON a.part_id = p.id
+WHERE
+  UPPER(p.part_number_canonical) = ?
+  OR UPPER(p.part_number_extracted) = ?
+  OR UPPER(p.part_number_cell) = ?
+  OR UPPER(a.alias_value) = ?
+ORDER BY d.pdf_name, p.figure_code, p.page_num, p.fig_item_no
+"""
+
+_XREFS_SQL = "SELECT part_id, kind, target FROM xrefs WHERE part_id IN ({q_marks}) ORDER BY part_id, kind"
+
+_READ_PRAGMAS = (
+    ("query_only", "ON"),
+    ("temp_store", "MEMORY"),
+    ("mmap_size", "268435456"),
+)
+
+
+class PartQueryRepo:
+    """只读件号查询：复用同一个连接，SQL 固定以命中 sqlite3 的语句缓存。"""
+
+    def __init__(self, db_path: str) -> None:
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        for pragma, value in _READ_PRAGMAS:
+            try:
+                self.conn.execute(f"PRAGMA {pragma}={value};")
+            except sqlite3.OperationalError:
+                pass
+
+    def find_rows(self, part_number: str) -> list[sqlite3.Row]:
+        return self.conn.execute(_PART_ROWS_SQL, (part_number,) * 4).fetchall()
+
+    def find_xrefs(self, part_ids: list[int]) -> list[sqlite3.Row]:
+        if not part_ids:
+            return []
+        q_marks = ",".join(["?"] * len(part_ids))
+        return self.conn.execute(_XREFS_SQL.format(q_marks=q_marks), part_ids).fetchall()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "PartQueryRepo":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
 def query(db_path: str, part_number: str) -> int:
     part_number = part_number.strip().upper()
     if not part_number:
         print("[ERR] empty part number")
         return 2
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    try:
-        rows = conn.execute(
-            """
-            SELECT
-              p.id,
-              d.pdf_name AS source_pdf,
-              p.page_num,
-              p.figure_code,
-              p.fig_item_raw,
-              p.fig_item_no,
-              p.not_illustrated,
-              p.part_number_cell,
-              p.part_number_extracted,
-              p.part_number_canonical,
-              p.pn_corrected,
-              p.pn_method,
-              p.pn_needs_review,
-              p.correction_note,
-              p.row_kind,
-              p.nomenclature,
-              p.effectivity,
-              p.units_per_assy
-            FROM parts p
-            JOIN documents d ON d.id = p.document_id
-            LEFT JOIN aliases a ON a.part_id = p.id
-            WHERE
-              UPPER(p.part_number_canonical) = ?
-              OR UPPER(p.part_number_extracted) = ?
-              OR UPPER(p.part_number_cell) = ?
-              OR UPPER(a.alias_value) = ?
-            ORDER BY d.pdf_name, p.figure_code, p.page_num, p.fig_item_no
-            """,
-            (part_number, part_number, part_number, part_number),
-        ).fetchall()
-
-        if not rows:
-            print(f"[MISS] {part_number} not found")
-            return 1
-
-        print(f"[HIT] {part_number}  ({len(rows)} rows)")
-        for r in rows:
-            title = shorten((r["nomenclature"] or "").replace("\n", " "), width=90, placeholder="…")
-            fig_raw = (r["fig_item_raw"] or "").strip()
-            fig_no = (r["fig_item_no"] or "").strip()
-            if fig_raw == "-" and fig_no:
-                fig_item = f"- {fig_no}"
-            elif fig_raw and fig_no:
-                fig_item = f"{fig_raw} {fig_no}"
-            else:
-                fig_item = fig_raw or fig_no
-
-            corr = " corrected" if r["pn_corrected"] else ""
-            warn = " review" if r["pn_needs_review"] else ""
-            raw_hint = ""
-            if r["pn_corrected"] and r["part_number_extracted"] and (r["part_number_extracted"] != r["part_number_canonical"]):
-                raw_hint = f" raw={r['part_number_extracted']}"
-            print(
-                f"- {r['source_pdf']} p{r['page_num']} {r['figure_code'] or ''}  FIG_ITEM={fig_item or ''}"
-                f"  PN={r['part_number_canonical'] or ''}{corr}{warn} ({r['pn_method']}){raw_hint}  QTY={r['units_per_assy'] or ''}"
-            )
-            if title:
-                print(f"  {title}")
-
-        # show xrefs (optional)
-        part_ids = [r["id"] for r in rows]
-        q_marks = ",".join(["?"] * len(part_ids))
-        xrefs = conn.execute(
-            f"SELECT part_id, kind, target FROM xrefs WHERE part_id IN ({q_marks}) ORDER BY part_id, kind",
-            part_ids,
-        ).fetchall()
-        if xrefs:
-            print("\n[XREF]")
-            for xr in xrefs:
-                print(f"- part_id={xr['part_id']} {xr['kind']}: {xr['target']}")
-
-        return 0
-    finally:
-        conn.close()
+    with PartQueryRepo(db_path) as repo:
+        return _print_part_rows(repo, part_number)
+
+
+def _format_part_row(r: sqlite3.Row) -> str:
+    fig_raw = (r["fig_item_raw"] or "").strip()
+    fig_no = (r["fig_item_no"] or "").strip()
+    if fig_raw == "-" and fig_no:
+        fig_item = f"- {fig_no}"
+    elif fig_raw and fig_no:
+        fig_item = f"{fig_raw} {fig_no}"
+    else:
+        fig_item = fig_raw or fig_no
+
+    corrected = bool(r["pn_corrected"])
+    extracted = r["part_number_extracted"]
+    canonical = r["part_number_canonical"]
+    corr = " corrected" if corrected else ""
+    warn = " review" if r["pn_needs_review"] else ""
+    raw_hint = f" raw={extracted}" if corrected and extracted and extracted != canonical else ""
+    line = (
+        f"- {r['source_pdf']} p{r['page_num']} {r['figure_code'] or ''}  FIG_ITEM={fig_item or ''}"
+        f"  PN={canonical or ''}{corr}{warn} ({r['pn_method']}){raw_hint}  QTY={r['units_per_assy'] or ''}\n"
+    )
+    title = shorten((r["nomenclature"] or "").replace("\n", " "), width=90, placeholder="…")
+    if title:
+        line += f"  {title}\n"
+    return line
+
+
+def _print_part_rows(repo: PartQueryRepo, part_number: str) -> int:
+    rows = repo.find_rows(part_number)
+    if not rows:
+        print(f"[MISS] {part_number} not found")
+        return 1
+
+    # 先格式化全部行再一次性写出，避免逐行 print 触发大量写调用
+    out: list[str] = [f"[HIT] {part_number}  ({len(rows)} rows)\n"]
+    out.extend(_format_part_row(r) for r in rows)
+
+    # show xrefs (optional)
+    xrefs = repo.find_xrefs([r["id"] for r in rows])
+    if xrefs:
+        out.append("\n[XREF]\n")
+        out.extend(f"- part_id={xr['part_id']} {xr['kind']}: {xr['target']}\n" for xr in xrefs)
+
+    sys.stdout.write("".join(out))
+    return 0
 
 
 def main() -> int:
@@ -6,6 +6,8 @@ pytest 配置和共享 fixtures
 
 from __future__ import annotations
 
+import os
+import shutil
 import sqlite3
 import tempfile
 from pathlib import Path
@@ -18,6 +20,28 @@ import pytest
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Linux 上把 tmp_path 根目录放到内存文件系统，测试库与 PDF 写入不落盘
+_SHM_DIR = Path("/dev/shm")
+_SHM_BASETEMP = pytest.StashKey[Path]()
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """未显式指定 --basetemp 时改用 /dev/shm；xdist worker 沿用主进程传下来的目录"""
+    if config.option.basetemp or hasattr(config, "workerinput"):
+        return
+    if sys.platform == "linux" and _SHM_DIR.is_dir() and os.access(_SHM_DIR, os.W_OK):
+        # 每次运行独占一个目录，同一用户并行运行的 pytest 不会互相清空；运行结束即删除。
+        # 需要保留失败用例的 tmp_path 排查时，显式传 --basetemp 即可绕过
+        path = Path(tempfile.mkdtemp(prefix="ipc_query-pytest-", dir=_SHM_DIR))
+        config.stash[_SHM_BASETEMP] = path
+        config.option.basetemp = str(path)
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    path = config.stash.get(_SHM_BASETEMP, None)
+    if path is not None:
+        shutil.rmtree(path, ignore_errors=True)
+
 
 @pytest.fixture
 def temp_db_path() -> Generator[Path, None, None]:
@@ -30,16 +54,25 @@ def temp_db_path() -> Generator[Path, None, None]:
         path.unlink()
 
 
-@pytest.fixture
-def sample_db(temp_db_path: Path) -> Generator[sqlite3.Connection, None, None]:
+# sample_db 的零件行，ID 按插入顺序为 1..6
+_SAMPLE_PARTS_ROWS: list[tuple[Any, ...]] = [
+    (1, 1, "A", "part", "1", "1", 0, "113A4200-1", "113A4200-1", "113A4200-1", 1, "BRACKET", "BRACKET", None),
+    (1, 1, "A", "part", "2", "2", 0, "113A4200-2", "113A4200-2", "113A4200-2", 2, "ASSY", "ASSY", None),
+    (1, 1, "A", "part", "3", "3", 0, "113A4200-3", "113A4200-3", "113A4200-3", 2, "COVER", "COVER", 2),
+    (1, 1, "B", "part", "4", "4", 0, "123B5000-1", "123B5000-1", "123B5000-1", 1, "PLATE", "PLATE", None),
+    (1, 1, "B", "part", "5", "5", 0, "123B5000-2", "123B5000-2", "123B5000-2", 1, "SCREW", "SCREW", None),
+    (1, 1, "B", "note", "6", "6", 0, None, None, None, 0, "NOTE: For reference", "NOTE: For reference", None),
+]
+
+
+@pytest.fixture(scope="session")
+def _sample_db_template() -> Generator[sqlite3.Connection, None, None]:
     """
-    创建包含示例数据的测试数据库
+    每个会话只建一次的示例数据库模板（内存库）
 
-    Returns:
-        sqlite3.Connection: 数据库连接
+    sample_db 通过 backup() 按页复制它，不必每个用例重放建表和插入语句。
     """
-    conn = sqlite3.connect(str(temp_db_path))
-    conn.row_factory = sqlite3.Row
+    conn = sqlite3.connect(":memory:")
 
     # 创建表结构
     conn.executescript("""
@@ -130,71 +163,17 @@ def sample_db(temp_db_path: Path) -> Generator[sqlite3.Connection, None, None]:
         "INSERT INTO pages (document_id, page_num, figure_label, date_text) VALUES (1, 1, 'FIG 1', '2024-01-01')"
     )
 
-    # 插入零件数据 - 使用明确的列名
-    # 零件 1: ID=1, 无父级
-    conn.execute(
-        """
-        INSERT INTO parts (
-            document_id, page_num, figure_code, row_kind,
-            fig_item_raw, fig_item_no, not_illustrated,
-            part_number_cell, part_number_extracted, part_number_canonical,
-            nom_level, nomenclature, nomenclature_clean, parent_part_id
-        ) VALUES (1, 1, 'A', 'part', '1', '1', 0, '113A4200-1', '113A4200-1', '113A4200-1', 1, 'BRACKET', 'BRACKET', NULL)
-        """
-    )
-    # 零件 2: ID=2, 无父级
-    conn.execute(
+    # 插入零件数据：一条预编译语句绑定多行（零件 3 的父级为零件 2，ID=6 为注释行）
+    conn.executemany(
         """
         INSERT INTO parts (
             document_id, page_num, figure_code, row_kind,
             fig_item_raw, fig_item_no, not_illustrated,
             part_number_cell, part_number_extracted, part_number_canonical,
             nom_level, nomenclature, nomenclature_clean, parent_part_id
-        ) VALUES (1, 1, 'A', 'part', '2', '2', 0, '113A4200-2', '113A4200-2', '113A4200-2', 2, 'ASSY', 'ASSY', NULL)
-        """
-    )
-    # 零件 3: ID=3, parent_part_id=2
-    conn.execute(
-        """
-        INSERT INTO parts (
-            document_id, page_num, figure_code, row_kind,
-            fig_item_raw, fig_item_no, not_illustrated,
-            part_number_cell, part_number_extracted, part_number_canonical,
-            nom_level, nomenclature, nomenclature_clean, parent_part_id
-        ) VALUES (1, 1, 'A', 'part', '3', '3', 0, '113A4200-3', '113A4200-3', '113A4200-3', 2, 'COVER', 'COVER', 2)
-        """
-    )
-    # 零件 4: ID=4
-    conn.execute(
-        """
-        INSERT INTO parts (
-            document_id, page_num, figure_code, row_kind,
-            fig_item_raw, fig_item_no, not_illustrated,
-            part_number_cell, part_number_extracted, part_number_canonical,
-            nom_level, nomenclature, nomenclature_clean, parent_part_id
-        ) VALUES (1, 1, 'B', 'part', '4', '4', 0, '123B5000-1', '123B5000-1', '123B5000-1', 1, 'PLATE', 'PLATE', NULL)
-        """
-    )
-    # 零件 5: ID=5
-    conn.execute(
-        """
-        INSERT INTO parts (
-            document_id, page_num, figure_code, row_kind,
-            fig_item_raw, fig_item_no, not_illustrated,
-            part_number_cell, part_number_extracted, part_number_canonical,
-            nom_level, nomenclature, nomenclature_clean, parent_part_id
-        ) VALUES (1, 1, 'B', 'part', '5', '5', 0, '123B5000-2', '123B5000-2', '123B5000-2', 1, 'SCREW', 'SCREW', NULL)
-        """
-    )
-    # 注释行: ID=6
-    conn.execute(
-        """
-        INSERT INTO parts (
-            document_id, page_num, figure_code, row_kind,
-            fig_item_raw, fig_item_no, not_illustrated,
-            nom_level, nomenclature, nomenclature_clean
-        ) VALUES (1, 1, 'B', 'note', '6', '6', 0, 0, 'NOTE: For reference', 'NOTE: For reference')
-        """
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        _SAMPLE_PARTS_ROWS,
     )
 
     # 插入别名
@@ -207,6 +186,21 @@ def sample_db(temp_db_path: Path) -> Generator[sqlite3.Connection, None, None]:
     conn.close()
 
 
+@pytest.fixture
+def sample_db(_sample_db_template: sqlite3.Connection) -> Generator[sqlite3.Connection, None, None]:
+    """
+    创建包含示例数据的测试数据库
+
+    Returns:
+        sqlite3.Connection: 数据库连接（模板的独立内存副本，用例间互不影响）
+    """
+    conn = sqlite3.connect(":memory:")
+    _sample_db_template.backup(conn)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
 @pytest.fixture
 def mock_config() -> MagicMock:
     """创建模拟配置对象"""
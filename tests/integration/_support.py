@@ -0,0 +1,340 @@
+"""
+集成测试公共辅助函数
+
+配置构建、服务器启动、HTTP 客户端与测试库读写的唯一实现，各测试模块与 conftest 共用。
+"""
+
+from __future__ import annotations
+
+import http.client
+import io
+import json
+import shutil
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, NamedTuple
+
+from ipc_query.api.server import RequestHandler, Server, create_server
+from ipc_query.config import Config
+
+try:  # 可选依赖：orjson 直接解析 bytes，比标准库快数倍
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None  # type: ignore[assignment]
+
+
+def loads(payload: bytes) -> Any:
+    """解析 JSON 响应体（bytes 直接传入，无需先 decode）"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def make_config(tmp_path: Path, db_path: Path, **overrides: Any) -> Config:
+    """tmp_path 下的测试配置；overrides 直接传给 Config（import_mode、鉴权开关等）"""
+    pdf_dir = tmp_path / "pdfs"
+    cache_dir = tmp_path / "cache"
+    cfg = Config(
+        database_path=db_path,
+        host="127.0.0.1",
+        port=0,
+        static_dir=Path("web"),
+        pdf_dir=pdf_dir,
+        upload_dir=pdf_dir,
+        cache_dir=cache_dir,
+        **overrides,
+    )
+    cfg.ensure_directories()
+    return cfg
+
+
+def ensure_pdf_subdir(cfg: Config, rel: str) -> Path:
+    """在 pdf_dir 下建子目录并返回其路径"""
+    assert cfg.pdf_dir is not None
+    path = cfg.pdf_dir / rel
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def start_server(server: Server) -> tuple[threading.Thread, int]:
+    """后台线程启动服务器，等待监听套接字就绪后返回 (线程, 端口)"""
+    thread = threading.Thread(target=server.start, daemon=True)
+    thread.start()
+
+    if server._ready.wait(timeout=5.0) and server._server is not None:
+        return thread, int(server._server.server_address[1])
+
+    server.stop()
+    thread.join(timeout=2.0)
+    raise AssertionError("server did not start in time")
+
+
+class LiveServer(NamedTuple):
+    server: Server
+    port: int
+    cfg: Config
+
+
+class InProcServer(NamedTuple):
+    server: Server
+    cfg: Config
+
+
+@contextmanager
+def serving(cfg: Config) -> Iterator[LiveServer]:
+    """按 cfg 创建并启动服务器，退出时停止；供模块级共享服务器 fixture 使用"""
+    server = create_server(cfg)
+    thread, port = start_server(server)
+    try:
+        yield LiveServer(server, port, cfg)
+    finally:
+        server.stop()
+        thread.join(timeout=3.0)
+
+
+# 清空顺序：先子表后 documents，避免外键约束
+_RESET_TABLES = ("aliases", "xrefs", "parts", "pages", "documents", "scan_state")
+
+
+def _wait_jobs_idle(server: Server, timeout_s: float = 10.0) -> None:
+    """等待导入/扫描任务全部结束（含启动扫描），避免后台任务与用例准备的数据互相覆盖"""
+    services = [svc for svc in (server._import, server._scan) if svc is not None]
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        if not any(
+            job["status"] in {"queued", "running"}
+            for svc in services
+            for job in svc.list_jobs(limit=1000)
+        ):
+            return
+        time.sleep(0.01)
+    raise AssertionError("background jobs did not finish")
+
+
+def reset_server_state(live: LiveServer | InProcServer) -> None:
+    """一个写事务清空全部业务表，并清掉 PDF 目录与搜索/渲染缓存"""
+    _wait_jobs_idle(live.server)
+    conn = open_db(live.cfg.database_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for table in _RESET_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+    finally:
+        conn.close()
+
+    # 只清空 pdf_dir 的内容、保留目录本身，Config.ensure_directories 记下的目录仍然存在
+    assert live.cfg.pdf_dir is not None
+    for child in live.cfg.pdf_dir.iterdir():
+        if child.is_dir():
+            shutil.rmtree(child)
+        else:
+            child.unlink()
+
+    live.server._search.clear_cache()
+    live.server._render.clear_cache()
+
+
+def http_request(
+    port: int,
+    method: str,
+    path: str,
+    *,
+    body: bytes | None = None,
+    headers: dict[str, str] | None = None,
+) -> tuple[int, bytes, dict[str, str]]:
+    """发送一个请求，返回 (status, body, 小写响应头)；服务端按 HTTP/1.0 应答，每个请求一条连接"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5.0)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        resp = conn.getresponse()
+        payload = resp.read()
+        return resp.status, payload, {k.lower(): v for (k, v) in resp.getheaders()}
+    finally:
+        conn.close()
+
+
+def request_json(
+    port: int,
+    method: str,
+    path: str,
+    *,
+    body: bytes | None = None,
+    headers: dict[str, str] | None = None,
+) -> tuple[int, dict[str, Any], dict[str, str]]:
+    """http_request 的 JSON 版本，返回 (status, 解析后的响应体, 小写响应头)"""
+    req_headers = {"Accept": "application/json"}
+    if headers:
+        req_headers.update(headers)
+    status, payload, out_headers = http_request(port, method, path, body=body, headers=req_headers)
+    return status, (loads(payload) if payload else {}), out_headers
+
+
+def wait_for_job(port: int, job_id: str, timeout_s: float = 3.0) -> dict[str, Any]:
+    """等待导入任务成功或失败；wait=1 让服务端在任务结束时立即返回，通常一次往返即可"""
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        status, body, _headers = request_json(port, "GET", f"/api/import/{job_id}?wait=1")
+        assert status == 200
+        if body.get("status") in {"success", "failed"}:
+            return body
+    raise AssertionError("import job did not reach terminal state in time")
+
+
+def open_db(db_path: Path) -> sqlite3.Connection:
+    # 测试库无需崩溃安全：WAL + synchronous=OFF，commit 与 checkpoint 都不再 fsync。
+    # 不用 locking_mode=EXCLUSIVE：共享服务器与测试代码同时打开同一个库文件
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
+
+
+def fresh_db(tmp_path: Path, template: Path) -> Path:
+    """把会话级 schema 模板复制为 tmp_path/data.sqlite，代替逐条执行建表 DDL"""
+    db_path = tmp_path / "data.sqlite"
+    shutil.copyfile(template, db_path)
+    return db_path
+
+
+def insert_docs(conn: sqlite3.Connection, rows: list[tuple[str, str]]) -> None:
+    """按 (pdf_name, relative_path) 批量插入文档：一个写事务、一次预编译、一次提交"""
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany(
+        """
+        INSERT INTO documents(pdf_name, relative_path, pdf_path, miner_dir, created_at)
+        VALUES (?, ?, ?, ?, datetime('now'))
+        """,
+        [(pdf_name, relative_path, relative_path, "{}") for pdf_name, relative_path in rows],
+    )
+    conn.commit()
+
+
+class JsonBody(Mapping[str, Any]):
+    """响应体的惰性视图：raw 保留原始字节，首次按键取值时才解析 JSON"""
+
+    __slots__ = ("raw", "_data")
+
+    def __init__(self, raw: bytes) -> None:
+        self.raw = raw
+        self._data: dict[str, Any] | None = None
+
+    def _parsed(self) -> dict[str, Any]:
+        if self._data is None:
+            self._data = loads(self.raw) if self.raw else {}
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        return self._parsed()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._parsed())
+
+    def __len__(self) -> int:
+        return len(self._parsed())
+
+    def __repr__(self) -> str:
+        return f"JsonBody({self.raw!r})"
+
+
+class _InProcessRequestHandler(RequestHandler):
+    """
+    进程内请求处理器
+
+    不经过套接字：请求体从内存读取，响应（状态行、响应头、响应体）写入内存缓冲区。
+    路由、鉴权与错误处理沿用 RequestHandler 的实现。
+    """
+
+    def __init__(self, server: Server, method: str, path: str, body: bytes, headers: Mapping[str, str]) -> None:
+        # RequestHandler 只从 self.server 读取这两个属性，与 Server.start() 挂到 HTTP 服务器上的一致
+        self.server = SimpleNamespace(  # type: ignore[assignment]
+            ipc_query_config=server._config, ipc_query_handlers=server._handlers()
+        )
+        self.client_address = ("127.0.0.1", 0)
+        self.command = method
+        self.path = path
+        self.request_version = "HTTP/1.0"
+        self.requestline = f"{method} {path} HTTP/1.0"
+        self.close_connection = True
+
+        message = http.client.HTTPMessage()
+        for key, value in headers.items():
+            message[key] = value
+        if body and message.get("Content-Length") is None:
+            message["Content-Length"] = str(len(body))
+        self.headers = message
+        self.rfile = io.BytesIO(body)
+        self._out = io.BytesIO()
+        self.wfile = self._out
+
+    def response(self) -> tuple[int, dict[str, str], bytes]:
+        """解析写入缓冲区的原始响应"""
+        head, _, body = self._out.getvalue().partition(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("iso-8859-1").split("\r\n")
+        response_headers: dict[str, str] = {}
+        for line in header_lines:
+            key, _, value = line.partition(":")
+            response_headers[key.strip()] = value.strip()
+        return int(status_line.split()[1]), response_headers, body
+
+
+def dispatch(
+    server: Server, method: str, path: str, body: bytes = b"", headers: Mapping[str, str] | None = None
+) -> tuple[int, dict[str, str], bytes]:
+    """在当前线程内处理一个请求，不绑定端口；返回 (状态码, 响应头, 响应体)，服务器无需 start()"""
+    handler = _InProcessRequestHandler(server, method.upper(), path, body, headers or {})
+    do_method = getattr(handler, f"do_{handler.command}", None)
+    if do_method is None:
+        raise ValueError(f"Unsupported method: {method}")
+    do_method()
+    return handler.response()
+
+
+class InProcessClient:
+    """进程内客户端：请求经 dispatch 交给真实的 RequestHandler，不经过 TCP；request() 返回 (状态码, 惰性 JSON 响应体)"""
+
+    def __init__(self, server: Server) -> None:
+        self._server = server
+
+    def __enter__(self) -> "InProcessClient":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    def request_raw(
+        self,
+        method: str,
+        path: str,
+        *,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, bytes]:
+        req_headers = {"Accept": "application/json"}
+        if headers:
+            req_headers.update(headers)
+        status, _resp_headers, payload = dispatch(self._server, method, path, body or b"", req_headers)
+        return status, payload
+
+    def request(self, method: str, path: str, **kwargs: Any) -> tuple[int, JsonBody]:
+        status, payload = self.request_raw(method, path, **kwargs)
+        return status, JsonBody(payload)
+
+    def get(self, path: str, **kwargs: Any) -> tuple[int, JsonBody]:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> tuple[int, JsonBody]:
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path: str, **kwargs: Any) -> tuple[int, JsonBody]:
+        return self.request("DELETE", path, **kwargs)
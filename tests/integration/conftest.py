@@ -0,0 +1,93 @@
+"""
+集成测试共享 fixtures
+
+live_server 在每个测试模块内只启动一次 HTTP 服务器（建库、建 schema、绑定端口都只做一次），
+每个测试开始前清空库表、PDF 目录与服务缓存。需要独立库结构或不同 import_mode 的测试
+在所属模块内用 serving 另起模块级服务器，或在用例内自行创建。
+
+inproc_server 与 live_server 一样按模块共享并在用例间清空，但不启动 HTTP 服务器线程；
+inproc_client 通过 _support.dispatch 在进程内向它发请求，不经过 TCP。只有确实需要验证
+网络往返或后台任务并发的用例才用 live_server 走真实连接。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Callable, Generator
+
+import pytest
+
+from build_db import ensure_schema
+# 经 services.render 导入 fitz（MuPDF 原生库）：每个 xdist worker 只在收集阶段加载一次，不计入用例耗时
+from ipc_query.api.server import Server, create_server
+
+from ._support import (
+    InProcServer,
+    InProcessClient,
+    LiveServer,
+    fresh_db,
+    make_config,
+    reset_server_state,
+    serving,
+)
+
+
+@pytest.fixture(scope="session")
+def schema_template_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """整个会话只执行一次 ensure_schema 的模板库；用例用 fresh_db 复制出独立副本"""
+    path = tmp_path_factory.mktemp("schema") / "template.sqlite"
+    # DDL 在内存库中执行，落盘只有一次 backup，不为每条建表语句提交/同步文件
+    mem = sqlite3.connect(":memory:")
+    disk = sqlite3.connect(str(path))
+    try:
+        ensure_schema(mem)
+        mem.backup(disk)
+        # 内存库没有 WAL，补上 ensure_schema 在磁盘库上会持久化的日志模式
+        disk.execute("PRAGMA journal_mode=WAL")
+    finally:
+        disk.close()
+        mem.close()
+    return path
+
+
+@pytest.fixture(scope="module")
+def _live_server_module(
+    tmp_path_factory: pytest.TempPathFactory, schema_template_path: Path
+) -> Generator[LiveServer, None, None]:
+    root = tmp_path_factory.mktemp("live_server")
+    with serving(make_config(root, fresh_db(root, schema_template_path))) as live:
+        yield live
+
+
+@pytest.fixture
+def live_server(_live_server_module: LiveServer) -> LiveServer:
+    """模块内共享的服务器，返回 (server, port, cfg)；每个测试开始前已清空数据"""
+    reset_server_state(_live_server_module)
+    return _live_server_module
+
+
+@pytest.fixture(scope="module")
+def _inproc_server_module(
+    tmp_path_factory: pytest.TempPathFactory, schema_template_path: Path
+) -> Generator[InProcServer, None, None]:
+    root = tmp_path_factory.mktemp("inproc_server")
+    cfg = make_config(root, fresh_db(root, schema_template_path))
+    server = create_server(cfg)
+    try:
+        yield InProcServer(server, cfg)
+    finally:
+        server.stop()
+
+
+@pytest.fixture
+def inproc_server(_inproc_server_module: InProcServer) -> InProcServer:
+    """模块内共享、不监听端口的服务器，返回 (server, cfg)，配合 inproc_client 使用；每个测试开始前已清空数据"""
+    reset_server_state(_inproc_server_module)
+    return _inproc_server_module
+
+
+@pytest.fixture
+def inproc_client() -> Callable[[Server], InProcessClient]:
+    """返回 server -> InProcessClient 的工厂；服务器无需 start()"""
+    return InProcessClient
@@ -4,89 +4,40 @@
 
 from __future__ import annotations
 
-import http.client
 import json
-import threading
 import time
+from collections.abc import Callable, Mapping
 from pathlib import Path
+from typing import Any
 
 from ipc_query.api.server import create_server
-from ipc_query.config import Config
 from ipc_query.services import importer as importer_module
 from ipc_query.services import scanner as scanner_module
 
-_PDF_PAYLOAD = b"%PDF-1.4\n1 0 obj\n<<>>\nendobj\ntrailer\n<<>>\n%%EOF\n"
-
-
-def _make_config(tmp_path: Path, db_path: Path, *, import_mode: str = "auto") -> Config:
-    pdf_dir = tmp_path / "pdfs"
-    cache_dir = tmp_path / "cache"
-    cfg = Config(
-        database_path=db_path,
-        host="127.0.0.1",
-        port=0,
-        static_dir=Path("web"),
-        pdf_dir=pdf_dir,
-        upload_dir=pdf_dir,
-        cache_dir=cache_dir,
-        import_mode=import_mode,
-    )
-    cfg.ensure_directories()
-    return cfg
-
-
-def _start_server(server) -> tuple[threading.Thread, int]:
-    thread = threading.Thread(target=server.start, daemon=True)
-    thread.start()
+from ._support import make_config, request_json
 
-    deadline = time.time() + 5.0
-    while time.time() < deadline:
-        if server._server is not None:
-            return thread, int(server._server.server_address[1])
-        time.sleep(0.02)
-
-    server.stop()
-    thread.join(timeout=2.0)
-    raise AssertionError("server did not start in time")
-
-
-def _request_json(
-    port: int,
-    method: str,
-    path: str,
-    *,
-    body: bytes | None = None,
-    headers: dict[str, str] | None = None,
-) -> tuple[int, dict]:
-    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5.0)
-    try:
-        req_headers = {"Accept": "application/json"}
-        if headers:
-            req_headers.update(headers)
-        conn.request(method, path, body=body, headers=req_headers)
-        resp = conn.getresponse()
-        payload = resp.read()
-    finally:
-        conn.close()
-
-    data = json.loads(payload.decode("utf-8")) if payload else {}
-    return resp.status, data
+_PDF_PAYLOAD = b"%PDF-1.4\n1 0 obj\n<<>>\nendobj\ntrailer\n<<>>\n%%EOF\n"
 
 
-def _wait_job(port: int, path: str, timeout_s: float = 4.0) -> dict:
+def _wait_job(
+    get: Callable[[str], tuple[int, Mapping[str, Any]]], path: str, timeout_s: float = 4.0
+) -> Mapping[str, Any]:
+    """轮询任务直到结束；get 为 path -> (状态码, 响应体)，可以是 inproc 客户端的 get 或 TCP 请求"""
+    # 指数退避：1ms 起步、30ms 封顶，快任务几乎立刻返回，慢任务的轮询频率不变
     deadline = time.time() + timeout_s
+    delay = 0.001
     while time.time() < deadline:
-        status, body = _request_json(port, "GET", path)
+        status, body = get(path)
         assert status == 200
         if body.get("status") in {"success", "failed"}:
             return body
-        time.sleep(0.03)
+        time.sleep(delay)
+        delay = min(delay * 2, 0.03)
     raise AssertionError("job did not finish")
 
 
-def test_folders_tree_import_and_scan(tmp_path: Path, monkeypatch) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
+def test_folders_tree_import_and_scan(live_server, monkeypatch) -> None:
+    _server, port, cfg = live_server
 
     def _fake_ingest(_conn: object, _pdf_paths: list[Path], **_kwargs: object) -> dict[str, int]:
         return {
@@ -100,85 +51,76 @@ def test_folders_tree_import_and_scan(tmp_path: Path, monkeypatch) -> None:
     monkeypatch.setattr(importer_module, "ingest_pdfs", _fake_ingest)
     monkeypatch.setattr(scanner_module, "ingest_pdfs", _fake_ingest)
 
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status_folder, _ = _request_json(
-            port,
-            "POST",
-            "/api/folders",
-            body=json.dumps({"path": "", "name": "engine"}).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-        )
-        assert status_folder == 201
-        assert (cfg.pdf_dir / "engine").is_dir()
+    def _get(path: str) -> tuple[int, Mapping[str, Any]]:
+        status, body, _headers = request_json(port, "GET", path)
+        return status, body
 
-        status_import, import_job = _request_json(
-            port,
-            "POST",
-            "/api/import?filename=part.pdf&target_dir=engine",
-            body=_PDF_PAYLOAD,
-            headers={
-                "Content-Type": "application/pdf",
-                "X-File-Name": "part.pdf",
-                "X-Target-Dir": "engine",
-            },
-        )
-        assert status_import == 202
-        import_terminal = _wait_job(port, f"/api/import/{import_job['job_id']}")
-        assert import_terminal["status"] == "success"
-        assert (cfg.pdf_dir / "engine" / "part.pdf").exists()
-
-        status_tree, tree = _request_json(port, "GET", "/api/docs/tree?path=engine")
-        assert status_tree == 200
-        assert tree["directories"] == []
-        assert any(f["name"] == "part.pdf" for f in tree["files"])
-
-        # 新文件写入后触发手动扫描
-        (cfg.pdf_dir / "engine" / "late.pdf").write_bytes(_PDF_PAYLOAD)
-        status_scan, scan_job = _request_json(port, "POST", "/api/scan?path=engine")
-        assert status_scan == 202
-        scan_terminal = _wait_job(port, f"/api/scan/{scan_job['job_id']}")
-        assert scan_terminal["status"] == "success"
-        assert int(scan_terminal["summary"]["scanned_files"]) >= 1
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_scan_disabled_when_import_mode_is_disabled(tmp_path: Path) -> None:
+    status_folder, _, _ = request_json(
+        port,
+        "POST",
+        "/api/folders",
+        body=json.dumps({"path": "", "name": "engine"}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    assert status_folder == 201
+    assert (cfg.pdf_dir / "engine").is_dir()
+
+    status_import, import_job, _ = request_json(
+        port,
+        "POST",
+        "/api/import?filename=part.pdf&target_dir=engine",
+        body=_PDF_PAYLOAD,
+        headers={
+            "Content-Type": "application/pdf",
+            "X-File-Name": "part.pdf",
+            "X-Target-Dir": "engine",
+        },
+    )
+    assert status_import == 202
+    import_terminal = _wait_job(_get, f"/api/import/{import_job['job_id']}")
+    assert import_terminal["status"] == "success"
+    assert (cfg.pdf_dir / "engine" / "part.pdf").exists()
+
+    status_tree, tree, _ = request_json(port, "GET", "/api/docs/tree?path=engine")
+    assert status_tree == 200
+    assert tree["directories"] == []
+    assert any(item["name"] == "part.pdf" for item in tree["files"])
+
+    # 新文件写入后触发手动扫描
+    (cfg.pdf_dir / "engine" / "late.pdf").write_bytes(_PDF_PAYLOAD)
+    status_scan, scan_job, _ = request_json(port, "POST", "/api/scan?path=engine")
+    assert status_scan == 202
+    scan_terminal = _wait_job(_get, f"/api/scan/{scan_job['job_id']}")
+    assert scan_terminal["status"] == "success"
+    assert int(scan_terminal["summary"]["scanned_files"]) >= 1
+
+
+def test_scan_disabled_when_import_mode_is_disabled(tmp_path: Path, inproc_client) -> None:
     db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path, import_mode="disabled")
+    cfg = make_config(tmp_path, db_path, import_mode="disabled")
     server = create_server(cfg)
-    thread, port = _start_server(server)
+    client = inproc_client(server)
     try:
-        status_scan, scan_body = _request_json(port, "POST", "/api/scan?path=engine")
+        status_scan, scan_body = client.post("/api/scan?path=engine")
         assert status_scan == 400
         assert scan_body["error"] == "VALIDATION_ERROR"
         assert "not enabled" in scan_body["message"].lower()
     finally:
+        client.close()
         server.stop()
-        thread.join(timeout=3.0)
 
 
-def test_folder_rename_and_recursive_delete(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status_folder, _ = _request_json(
-            port,
-            "POST",
+def test_folder_rename_and_recursive_delete(inproc_server, inproc_client) -> None:
+    server, cfg = inproc_server
+    with inproc_client(server) as client:
+        status_folder, _ = client.post(
             "/api/folders",
             body=json.dumps({"path": "", "name": "engine"}).encode("utf-8"),
             headers={"Content-Type": "application/json"},
         )
         assert status_folder == 201
 
-        status_import, import_job = _request_json(
-            port,
-            "POST",
+        status_import, import_job = client.post(
             "/api/import?filename=part.pdf&target_dir=engine",
             body=_PDF_PAYLOAD,
             headers={
@@ -188,13 +130,11 @@ def test_folder_rename_and_recursive_delete(tmp_path: Path) -> None:
             },
         )
         assert status_import == 202
-        import_terminal = _wait_job(port, f"/api/import/{import_job['job_id']}")
+        import_terminal = _wait_job(client.get, f"/api/import/{import_job['job_id']}")
         assert import_terminal["status"] == "success"
         assert (cfg.pdf_dir / "engine" / "part.pdf").exists()
 
-        status_rename, rename_payload = _request_json(
-            port,
-            "POST",
+        status_rename, rename_payload = client.post(
             "/api/folders/rename",
             body=json.dumps({"path": "engine", "new_name": "engine-new"}).encode("utf-8"),
             headers={"Content-Type": "application/json"},
@@ -204,9 +144,7 @@ def test_folder_rename_and_recursive_delete(tmp_path: Path) -> None:
         assert rename_payload["new_path"] == "engine-new"
         assert (cfg.pdf_dir / "engine-new" / "part.pdf").exists()
 
-        status_delete, delete_payload = _request_json(
-            port,
-            "POST",
+        status_delete, delete_payload = client.post(
             "/api/folders/delete",
             body=json.dumps({"paths": ["engine-new"], "recursive": True}).encode("utf-8"),
             headers={"Content-Type": "application/json"},
@@ -215,35 +153,22 @@ def test_folder_rename_and_recursive_delete(tmp_path: Path) -> None:
         assert delete_payload["deleted"] == 1
         assert delete_payload["failed"] == 0
         assert not (cfg.pdf_dir / "engine-new").exists()
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
 
 
-def test_create_folder_under_child_path_is_rejected(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status_folder, _ = _request_json(
-            port,
-            "POST",
+def test_create_folder_under_child_path_is_rejected(inproc_server, inproc_client) -> None:
+    server, cfg = inproc_server
+    with inproc_client(server) as client:
+        status_folder, _ = client.post(
             "/api/folders",
             body=json.dumps({"path": "", "name": "engine"}).encode("utf-8"),
             headers={"Content-Type": "application/json"},
         )
         assert status_folder == 201
 
-        status_nested, body_nested = _request_json(
-            port,
-            "POST",
+        status_nested, body_nested = client.post(
             "/api/folders",
             body=json.dumps({"path": "engine", "name": "nested"}).encode("utf-8"),
             headers={"Content-Type": "application/json"},
         )
         assert status_nested == 400
         assert body_nested["error"] == "VALIDATION_ERROR"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
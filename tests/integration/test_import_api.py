@@ -5,141 +5,39 @@
 from __future__ import annotations
 
 import http.client
-import json
-import sqlite3
-import threading
-import time
 from pathlib import Path
 
 import pytest
 
-from build_db import ensure_schema
 from ipc_query.api.server import create_server
-from ipc_query.config import Config
 from ipc_query.exceptions import RateLimitError
 from ipc_query.services import importer as importer_module
 
-_PDF_PAYLOAD = b"%PDF-1.4\n1 0 obj\n<<>>\nendobj\ntrailer\n<<>>\n%%EOF\n"
-
-
-def _make_config(
-    tmp_path: Path,
-    db_path: Path,
-    *,
-    max_file_size_mb: int = 100,
-    import_mode: str = "auto",
-) -> Config:
-    pdf_dir = tmp_path / "pdfs"
-    cache_dir = tmp_path / "cache"
-    cfg = Config(
-        database_path=db_path,
-        host="127.0.0.1",
-        port=0,
-        static_dir=Path("web"),
-        pdf_dir=pdf_dir,
-        upload_dir=pdf_dir,
-        cache_dir=cache_dir,
-        import_max_file_size_mb=max_file_size_mb,
-        import_mode=import_mode,
-    )
-    cfg.ensure_directories()
-    return cfg
-
-
-def _start_server(server) -> tuple[threading.Thread, int]:
-    thread = threading.Thread(target=server.start, daemon=True)
-    thread.start()
-
-    deadline = time.time() + 5.0
-    while time.time() < deadline:
-        if server._server is not None:
-            return thread, int(server._server.server_address[1])
-        time.sleep(0.02)
-
-    server.stop()
-    thread.join(timeout=2.0)
-    raise AssertionError("server did not start in time")
-
-
-def _request_json(
-    port: int,
-    method: str,
-    path: str,
-    *,
-    body: bytes | None = None,
-    headers: dict[str, str] | None = None,
-) -> tuple[int, dict]:
-    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5.0)
-    try:
-        req_headers = {"Accept": "application/json"}
-        if headers:
-            req_headers.update(headers)
-        conn.request(method, path, body=body, headers=req_headers)
-        resp = conn.getresponse()
-        payload = resp.read()
-    finally:
-        conn.close()
-
-    data = json.loads(payload.decode("utf-8")) if payload else {}
-    return resp.status, data
-
-
-def _request_json_with_headers(
-    port: int,
-    method: str,
-    path: str,
-    *,
-    body: bytes | None = None,
-    headers: dict[str, str] | None = None,
-) -> tuple[int, dict, dict[str, str]]:
-    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5.0)
-    try:
-        req_headers = {"Accept": "application/json"}
-        if headers:
-            req_headers.update(headers)
-        conn.request(method, path, body=body, headers=req_headers)
-        resp = conn.getresponse()
-        payload = resp.read()
-        out_headers = {k.lower(): v for (k, v) in resp.getheaders()}
-    finally:
-        conn.close()
+from ._support import fresh_db, loads, make_config, request_json, start_server, wait_for_job
 
-    data = json.loads(payload.decode("utf-8")) if payload else {}
-    return resp.status, data, out_headers
+_PDF_PAYLOAD = b"%PDF-1.4\n1 0 obj\n<<>>\nendobj\ntrailer\n<<>>\n%%EOF\n"
 
 
 def _raw_post_json(port: int, path: str, headers: dict[str, str], body: bytes = b"") -> tuple[int, dict]:
+    """按原样发送请求头（不自动补 Content-Length），用于构造缺失/非法长度的请求"""
     conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5.0)
     try:
         conn.putrequest("POST", path)
         for k, v in headers.items():
             conn.putheader(k, v)
-        conn.endheaders()
-        if body:
-            conn.send(body)
+        # putheader 只写入缓冲区；请求体随 endheaders 一并发出，整个请求只需一次 send
+        conn.endheaders(body or None)
         resp = conn.getresponse()
         payload = resp.read()
     finally:
         conn.close()
 
-    data = json.loads(payload.decode("utf-8")) if payload else {}
+    data = loads(payload) if payload else {}
     return resp.status, data
 
 
-def _wait_for_job(port: int, job_id: str, timeout_s: float = 3.0) -> dict:
-    deadline = time.time() + timeout_s
-    while time.time() < deadline:
-        status, body = _request_json(port, "GET", f"/api/import/{job_id}")
-        assert status == 200
-        if body.get("status") in {"success", "failed"}:
-            return body
-        time.sleep(0.02)
-    raise AssertionError("import job did not reach terminal state in time")
-
-
-def test_import_submit_and_jobs_endpoints(tmp_path: Path, monkeypatch) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path, import_mode="enabled")
+def test_import_submit_and_jobs_endpoints(live_server, monkeypatch) -> None:
+    _server, port, _cfg = live_server
 
     def _fake_ingest(_conn: object, _pdf_paths: list[Path]) -> dict[str, int]:
         return {
@@ -152,87 +50,67 @@ def test_import_submit_and_jobs_endpoints(tmp_path: Path, monkeypatch) -> None:
 
     monkeypatch.setattr(importer_module, "ingest_pdfs", _fake_ingest)
 
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, body = _request_json(
-            port,
-            "POST",
-            "/api/import",
-            body=_PDF_PAYLOAD,
-            headers={
-                "Content-Type": "application/pdf",
-                "X-File-Name": "uploaded.pdf",
-            },
-        )
-        assert status == 202
-        job_id = str(body.get("job_id") or "")
-        assert job_id
-
-        terminal = _wait_for_job(port, job_id)
-        assert terminal["status"] == "success"
-        assert terminal["summary"]["docs_ingested"] == 1
-
-        status_jobs, jobs_body = _request_json(port, "GET", "/api/import/jobs?limit=10")
-        assert status_jobs == 200
-        job_ids = [str(item["job_id"]) for item in jobs_body["jobs"]]
-        assert job_id in job_ids
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_import_rejects_missing_content_length(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, body = _raw_post_json(
-            port,
-            "/api/import?filename=no-length.pdf",
-            headers={
-                "Accept": "application/json",
-                "Content-Type": "application/pdf",
-                "X-File-Name": "no-length.pdf",
-            },
-        )
-        assert status == 400
-        assert body["error"] == "VALIDATION_ERROR"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_import_rejects_invalid_content_length(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, body = _raw_post_json(
-            port,
-            "/api/import?filename=bad-length.pdf",
-            headers={
-                "Accept": "application/json",
-                "Content-Type": "application/pdf",
-                "X-File-Name": "bad-length.pdf",
-                "Content-Length": "abc",
-            },
-        )
-        assert status == 400
-        assert body["error"] == "VALIDATION_ERROR"
-        assert "Content-Length" in body["message"]
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
+    status, body, _ = request_json(
+        port,
+        "POST",
+        "/api/import",
+        body=_PDF_PAYLOAD,
+        headers={
+            "Content-Type": "application/pdf",
+            "X-File-Name": "uploaded.pdf",
+        },
+    )
+    assert status == 202
+    job_id = str(body.get("job_id") or "")
+    assert job_id
+
+    terminal = wait_for_job(port, job_id)
+    assert terminal["status"] == "success"
+    assert terminal["summary"]["docs_ingested"] == 1
+
+    status_jobs, jobs_body, _ = request_json(port, "GET", "/api/import/jobs?limit=10")
+    assert status_jobs == 200
+    job_ids = [str(item["job_id"]) for item in jobs_body["jobs"]]
+    assert job_id in job_ids
+
+
+def test_import_rejects_missing_content_length(live_server) -> None:
+    _server, port, _cfg = live_server
+    status, body = _raw_post_json(
+        port,
+        "/api/import?filename=no-length.pdf",
+        headers={
+            "Accept": "application/json",
+            "Content-Type": "application/pdf",
+            "X-File-Name": "no-length.pdf",
+        },
+    )
+    assert status == 400
+    assert body["error"] == "VALIDATION_ERROR"
+
+
+def test_import_rejects_invalid_content_length(live_server) -> None:
+    _server, port, _cfg = live_server
+    status, body = _raw_post_json(
+        port,
+        "/api/import?filename=bad-length.pdf",
+        headers={
+            "Accept": "application/json",
+            "Content-Type": "application/pdf",
+            "X-File-Name": "bad-length.pdf",
+            "Content-Length": "abc",
+        },
+    )
+    assert status == 400
+    assert body["error"] == "VALIDATION_ERROR"
+    assert "Content-Length" in body["message"]
 
 
 def test_import_rejects_oversized_body(tmp_path: Path) -> None:
     db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path, max_file_size_mb=1)
+    cfg = make_config(tmp_path, db_path, import_max_file_size_mb=1)
     server = create_server(cfg)
-    thread, port = _start_server(server)
+    thread, port = start_server(server)
     try:
         status, body = _raw_post_json(
             port,
@@ -252,41 +130,31 @@ def test_import_rejects_oversized_body(tmp_path: Path) -> None:
         thread.join(timeout=3.0)
 
 
-def test_import_rejects_invalid_pdf_signature(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, body = _request_json(
-            port,
-            "POST",
-            "/api/import",
-            body=b"not a pdf",
-            headers={
-                "Content-Type": "application/pdf",
-                "X-File-Name": "bad.pdf",
-            },
-        )
-        assert status == 400
-        assert body["error"] == "VALIDATION_ERROR"
-        assert "signature" in body["message"].lower()
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
+def test_import_rejects_invalid_pdf_signature(live_server) -> None:
+    _server, port, _cfg = live_server
+    status, body, _ = request_json(
+        port,
+        "POST",
+        "/api/import",
+        body=b"not a pdf",
+        headers={
+            "Content-Type": "application/pdf",
+            "X-File-Name": "bad.pdf",
+        },
+    )
+    assert status == 400
+    assert body["error"] == "VALIDATION_ERROR"
+    assert "signature" in body["message"].lower()
 
-def test_import_disabled_when_db_is_readonly(tmp_path: Path) -> None:
-    db_path = tmp_path / "readonly.sqlite"
-    with sqlite3.connect(str(db_path)) as conn:
-        ensure_schema(conn)
 
+def test_import_disabled_when_db_is_readonly(tmp_path: Path, schema_template_path: Path) -> None:
+    db_path = fresh_db(tmp_path, schema_template_path)
     db_path.chmod(0o444)
-    cfg = _make_config(tmp_path, db_path)
+    cfg = make_config(tmp_path, db_path)
     server = create_server(cfg)
-    thread, port = _start_server(server)
+    thread, port = start_server(server)
     try:
-        status, body = _request_json(
+        status, body, _ = request_json(
             port,
             "POST",
             "/api/import",
@@ -307,11 +175,11 @@ def test_import_disabled_when_db_is_readonly(tmp_path: Path) -> None:
 
 def test_import_disabled_when_import_mode_is_disabled(tmp_path: Path) -> None:
     db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path, import_mode="disabled")
+    cfg = make_config(tmp_path, db_path, import_mode="disabled")
     server = create_server(cfg)
-    thread, port = _start_server(server)
+    thread, port = start_server(server)
     try:
-        status, body = _request_json(
+        status, body, _ = request_json(
             port,
             "POST",
             "/api/import",
@@ -329,31 +197,24 @@ def test_import_disabled_when_import_mode_is_disabled(tmp_path: Path) -> None:
         thread.join(timeout=3.0)
 
 
-def test_import_queue_full_returns_429_with_retry_after(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
-    db_path = tmp_path / "rate-limit.sqlite"
-    cfg = _make_config(tmp_path, db_path, import_mode="enabled")
+def test_import_queue_full_returns_429_with_retry_after(live_server, monkeypatch: pytest.MonkeyPatch) -> None:
+    _server, port, _cfg = live_server
 
     def _raise_rate_limited(*_args, **_kwargs):
         raise RateLimitError("Import queue is full, please retry later", retry_after=3)
 
     monkeypatch.setattr(importer_module.ImportService, "submit_upload", _raise_rate_limited)
 
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, body, headers = _request_json_with_headers(
-            port,
-            "POST",
-            "/api/import",
-            body=_PDF_PAYLOAD,
-            headers={
-                "Content-Type": "application/pdf",
-                "X-File-Name": "queue-full.pdf",
-            },
-        )
-        assert status == 429
-        assert body["error"] == "RATE_LIMITED"
-        assert headers.get("retry-after") == "3"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
+    status, body, headers = request_json(
+        port,
+        "POST",
+        "/api/import",
+        body=_PDF_PAYLOAD,
+        headers={
+            "Content-Type": "application/pdf",
+            "X-File-Name": "queue-full.pdf",
+        },
+    )
+    assert status == 429
+    assert body["error"] == "RATE_LIMITED"
+    assert headers.get("retry-after") == "3"
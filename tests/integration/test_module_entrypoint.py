@@ -4,26 +4,29 @@
 
 from __future__ import annotations
 
-import subprocess
+import logging
+import runpy
 import sys
 from pathlib import Path
 
+import pytest
 
-def test_python_m_ipc_query_propagates_exit_code(tmp_path: Path) -> None:
+
+def test_python_m_ipc_query_propagates_exit_code(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
     missing_db = tmp_path / "missing.sqlite"
-    proc = subprocess.run(
-        [
-            sys.executable,
-            "-m",
-            "ipc_query",
-            "query",
-            "abc",
-            "--db",
-            str(missing_db),
-        ],
-        capture_output=True,
-        text=True,
-    )
+    monkeypatch.setattr(sys, "argv", ["ipc_query", "query", "abc", "--db", str(missing_db)])
+    # 在进程内按 python -m 的方式执行 __main__，省去子进程解释器启动；
+    # 命令会调用 setup_logging 重置根日志器，这里保存并在结束时还原
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", list(root.handlers))
+    level = root.level
+    try:
+        with pytest.raises(SystemExit) as exc_info:
+            runpy.run_module("ipc_query", run_name="__main__", alter_sys=True)
+    finally:
+        root.setLevel(level)
 
-    assert proc.returncode == 2
-    assert "Database not found" in proc.stdout
+    assert exc_info.value.code == 2
+    assert "Database not found" in capsys.readouterr().out
@@ -4,68 +4,16 @@ GET /api/part/{id} 集成测试
 
 from __future__ import annotations
 
-import http.client
-import json
-import sqlite3
-import threading
-import time
-from pathlib import Path
+from contextlib import closing
 
-from build_db import ensure_schema
-from ipc_query.api.server import create_server
-from ipc_query.config import Config
+from ._support import open_db, request_json
 
 
-def _make_config(tmp_path: Path, db_path: Path) -> Config:
-    pdf_dir = tmp_path / "pdfs"
-    cache_dir = tmp_path / "cache"
-    cfg = Config(
-        database_path=db_path,
-        host="127.0.0.1",
-        port=0,
-        static_dir=Path("web"),
-        pdf_dir=pdf_dir,
-        upload_dir=pdf_dir,
-        cache_dir=cache_dir,
-    )
-    cfg.ensure_directories()
-    return cfg
+def test_part_detail_includes_source_relative_path(live_server) -> None:
+    _server, port, cfg = live_server
 
-
-def _start_server(server) -> tuple[threading.Thread, int]:
-    thread = threading.Thread(target=server.start, daemon=True)
-    thread.start()
-
-    deadline = time.time() + 5.0
-    while time.time() < deadline:
-        if server._server is not None:
-            return thread, int(server._server.server_address[1])
-        time.sleep(0.02)
-
-    server.stop()
-    thread.join(timeout=2.0)
-    raise AssertionError("server did not start in time")
-
-
-def _request_json(port: int, method: str, path: str) -> tuple[int, dict]:
-    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5.0)
-    try:
-        conn.request(method, path, headers={"Accept": "application/json"})
-        resp = conn.getresponse()
-        payload = resp.read()
-    finally:
-        conn.close()
-
-    data = json.loads(payload.decode("utf-8")) if payload else {}
-    return resp.status, data
-
-
-def test_part_detail_includes_source_relative_path(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-
-    with sqlite3.connect(str(db_path)) as conn:
-        ensure_schema(conn)
+    # 所有插入处于同一事务，退出时只提交一次；closing 保证连接不残留在共享库上
+    with closing(open_db(cfg.database_path)) as conn, conn:
         cur = conn.execute(
             """
             INSERT INTO documents(pdf_name, relative_path, pdf_path, miner_dir, created_at)
@@ -91,30 +39,21 @@ def test_part_detail_includes_source_relative_path(tmp_path: Path) -> None:
             """,
             (doc_id, 1, "11-36-01-79E", "FIG. 79E", "APR 15/21", "PAGE 1", "RF 11-36-01"),
         )
-        conn.commit()
 
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, body = _request_json(port, "GET", f"/api/part/{part_id}")
-        assert status == 200
-        assert body["part"]["pdf"] == "a.pdf"
-        assert body["part"]["source_relative_path"] == "sub/a.pdf"
-        assert body["part"]["figure_label"] == "FIG. 79E"
-        assert body["part"]["date_text"] == "APR 15/21"
-        assert body["part"]["page_token"] == "PAGE 1"
-        assert body["part"]["rf_text"] == "RF 11-36-01"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
+    status, body, _ = request_json(port, "GET", f"/api/part/{part_id}")
+    assert status == 200
+    assert body["part"]["pdf"] == "a.pdf"
+    assert body["part"]["source_relative_path"] == "sub/a.pdf"
+    assert body["part"]["figure_label"] == "FIG. 79E"
+    assert body["part"]["date_text"] == "APR 15/21"
+    assert body["part"]["page_token"] == "PAGE 1"
+    assert body["part"]["rf_text"] == "RF 11-36-01"
 
 
-def test_part_detail_children_include_source_relative_path(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
+def test_part_detail_children_include_source_relative_path(live_server) -> None:
+    _server, port, cfg = live_server
 
-    with sqlite3.connect(str(db_path)) as conn:
-        ensure_schema(conn)
+    with closing(open_db(cfg.database_path)) as conn, conn:
         cur = conn.execute(
             """
             INSERT INTO documents(pdf_name, relative_path, pdf_path, miner_dir, created_at)
@@ -142,20 +81,13 @@ def test_part_detail_children_include_source_relative_path(tmp_path: Path) -> No
             """,
             (doc_id, 1, 1, "pdf_coords", "part", "P-CHILD", "P-CHILD", 1, "CHILD", "CHILD", parent_id),
         )
-        conn.commit()
 
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, body = _request_json(port, "GET", f"/api/part/{parent_id}")
-        assert status == 200
-        assert body["part"]["figure_label"] is None
-        assert body["part"]["date_text"] is None
-        assert body["part"]["page_token"] is None
-        assert body["part"]["rf_text"] is None
-        assert len(body["children"]) == 1
-        assert body["children"][0]["pdf"] == "a.pdf"
-        assert body["children"][0]["source_relative_path"] == "sub/a.pdf"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
+    status, body, _ = request_json(port, "GET", f"/api/part/{parent_id}")
+    assert status == 200
+    assert body["part"]["figure_label"] is None
+    assert body["part"]["date_text"] is None
+    assert body["part"]["page_token"] is None
+    assert body["part"]["rf_text"] is None
+    assert len(body["children"]) == 1
+    assert body["children"][0]["pdf"] == "a.pdf"
+    assert body["children"][0]["source_relative_path"] == "sub/a.pdf"
@@ -4,264 +4,149 @@
 
 from __future__ import annotations
 
-import http.client
-import json
-import threading
-import time
-from pathlib import Path
 from urllib.parse import quote
 
-from ipc_query.api.server import create_server
-from ipc_query.config import Config
+import pytest
+
 from ipc_query.exceptions import RateLimitError
 
+from ._support import loads, http_request
 
-def _make_config(tmp_path: Path, db_path: Path) -> Config:
-    pdf_dir = tmp_path / "pdfs"
-    cache_dir = tmp_path / "cache"
-    cfg = Config(
-        database_path=db_path,
-        host="127.0.0.1",
-        port=0,
-        static_dir=Path("web"),
-        pdf_dir=pdf_dir,
-        upload_dir=pdf_dir,
-        cache_dir=cache_dir,
-    )
-    cfg.ensure_directories()
-    return cfg
-
-
-def _start_server(server) -> tuple[threading.Thread, int]:
-    thread = threading.Thread(target=server.start, daemon=True)
-    thread.start()
-
-    deadline = time.time() + 5.0
-    while time.time() < deadline:
-        if server._server is not None:
-            return thread, int(server._server.server_address[1])
-        time.sleep(0.02)
-
-    server.stop()
-    thread.join(timeout=2.0)
-    raise AssertionError("server did not start in time")
-
-
-def _request(
-    port: int,
-    method: str,
-    path: str,
-    *,
-    headers: dict[str, str] | None = None,
-    body: bytes | None = None,
-) -> tuple[int, bytes, dict[str, str]]:
-    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5.0)
-    try:
-        req_headers = headers or {}
-        conn.request(method, path, body=body, headers=req_headers)
-        resp = conn.getresponse()
-        payload = resp.read()
-        out_headers = {k.lower(): v for (k, v) in resp.getheaders()}
-    finally:
-        conn.close()
-    return resp.status, payload, out_headers
-
-
-def test_head_root_and_static_not_found(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, _payload, headers = _request(port, "HEAD", "/")
+_RANGE_PDF = b"%PDF-1.4\nabcdefg\n%%EOF\n"
+_RANGE_MULTI_PDF = b"%PDF-1.4\nabcdefghij\n%%EOF\n"
+
+
+def test_head_root_and_static_not_found(live_server) -> None:
+    _server, port, _cfg = live_server
+    status, _payload, headers = http_request(port, "HEAD", "/")
+    assert status == 200
+    assert "content-length" in headers
+
+    status_404, payload_404, _headers_404 = http_request(port, "GET", "/not-found.js")
+    assert status_404 == 404
+    body = loads(payload_404)
+    assert body["error"] == "not_found"
+
+
+def test_web_route_aliases_return_html(live_server) -> None:
+    _server, port, _cfg = live_server
+    for path in ("/search", "/db", "/part/1"):
+        status, payload, headers = http_request(port, "GET", path)
         assert status == 200
-        assert "content-length" in headers
-
-        status_404, payload_404, _headers_404 = _request(port, "GET", "/not-found.js")
-        assert status_404 == 404
-        body = json.loads(payload_404.decode("utf-8"))
-        assert body["error"] == "not_found"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_web_route_aliases_return_html(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        for path in ("/search", "/db", "/part/1"):
-            status, payload, headers = _request(port, "GET", path)
-            assert status == 200
-            assert "text/html" in headers.get("content-type", "")
-            assert b"<!doctype html>" in payload.lower()
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_legacy_viewer_page_is_removed(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, payload, _ = _request(port, "GET", "/viewer.html")
-        assert status == 404
-        body = json.loads(payload.decode("utf-8"))
-        assert body["error"] == "not_found"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_post_and_delete_unsupported_paths_return_not_found(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status_post, payload_post, _ = _request(port, "POST", "/api/unknown")
-        body_post = json.loads(payload_post.decode("utf-8"))
-        assert status_post == 404
-        assert body_post["error"] == "NOT_FOUND"
-
-        status_del, payload_del, _ = _request(port, "DELETE", "/api/unknown")
-        body_del = json.loads(payload_del.decode("utf-8"))
-        assert status_del == 404
-        assert body_del["error"] == "NOT_FOUND"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_import_job_not_found_and_missing_id(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status_missing, payload_missing, _ = _request(port, "GET", "/api/import/not-exists")
-        body_missing = json.loads(payload_missing.decode("utf-8"))
-        assert status_missing == 404
-        assert body_missing["error"] == "NOT_FOUND"
-
-        status_no_id, payload_no_id, _ = _request(port, "GET", "/api/import/")
-        body_no_id = json.loads(payload_no_id.decode("utf-8"))
-        assert status_no_id == 404
-        assert body_no_id["error"] == "NOT_FOUND"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_pdf_range_request_returns_partial_content(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
+        assert "text/html" in headers.get("content-type", "")
+        assert b"<!doctype html>" in payload.lower()
+
+
+def test_legacy_viewer_page_is_removed(live_server) -> None:
+    _server, port, _cfg = live_server
+    status, payload, _ = http_request(port, "GET", "/viewer.html")
+    assert status == 404
+    body = loads(payload)
+    assert body["error"] == "not_found"
+
+
+def test_post_and_delete_unsupported_paths_return_not_found(live_server) -> None:
+    _server, port, _cfg = live_server
+    status_post, payload_post, _ = http_request(port, "POST", "/api/unknown")
+    body_post = loads(payload_post)
+    assert status_post == 404
+    assert body_post["error"] == "NOT_FOUND"
+
+    status_del, payload_del, _ = http_request(port, "DELETE", "/api/unknown")
+    body_del = loads(payload_del)
+    assert status_del == 404
+    assert body_del["error"] == "NOT_FOUND"
+
+
+def test_import_job_not_found_and_missing_id(live_server) -> None:
+    _server, port, _cfg = live_server
+    status_missing, payload_missing, _ = http_request(port, "GET", "/api/import/not-exists")
+    body_missing = loads(payload_missing)
+    assert status_missing == 404
+    assert body_missing["error"] == "NOT_FOUND"
+
+    status_no_id, payload_no_id, _ = http_request(port, "GET", "/api/import/")
+    body_no_id = loads(payload_no_id)
+    assert status_no_id == 404
+    assert body_no_id["error"] == "NOT_FOUND"
+
+
+def test_pdf_range_request_returns_partial_content(live_server) -> None:
+    _server, port, cfg = live_server
 
     pdf_name = "range test.pdf"
     pdf_path = cfg.pdf_dir / pdf_name
-    content = b"%PDF-1.4\nabcdefg\n%%EOF\n"
-    pdf_path.write_bytes(content)
-
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, payload, headers = _request(
-            port,
-            "GET",
-            f"/pdf/{quote(pdf_name, safe='')}",
-            headers={"Range": "bytes=0-4"},
-        )
-        assert status == 206
-        assert payload == content[:5]
-        assert headers.get("content-range", "").startswith("bytes 0-4/")
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_pdf_range_suffix_and_open_ended_and_invalid_ranges(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
+    pdf_path.write_bytes(_RANGE_PDF)
+
+    status, payload, headers = http_request(
+        port,
+        "GET",
+        f"/pdf/{quote(pdf_name, safe='')}",
+        headers={"Range": "bytes=0-4"},
+    )
+    assert status == 206
+    assert payload == _RANGE_PDF[:5]
+    assert headers.get("content-range", "").startswith("bytes 0-4/")
+
+
+def test_pdf_range_suffix_and_open_ended_and_invalid_ranges(live_server) -> None:
+    _server, port, cfg = live_server
 
     pdf_name = "range-multi.pdf"
     pdf_path = cfg.pdf_dir / pdf_name
-    content = b"%PDF-1.4\nabcdefghij\n%%EOF\n"
-    pdf_path.write_bytes(content)
-
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status_suffix, payload_suffix, headers_suffix = _request(
-            port,
-            "GET",
-            f"/pdf/{quote(pdf_name, safe='')}",
-            headers={"Range": "bytes=-4"},
-        )
-        assert status_suffix == 206
-        assert payload_suffix == content[-4:]
-        assert headers_suffix.get("content-range", "").endswith(f"/{len(content)}")
-
-        status_open, payload_open, headers_open = _request(
-            port,
-            "GET",
-            f"/pdf/{quote(pdf_name, safe='')}",
-            headers={"Range": "bytes=5-"},
-        )
-        assert status_open == 206
-        assert payload_open == content[5:]
-        assert headers_open.get("content-range", "").startswith(f"bytes 5-{len(content)-1}/")
-
-        status_invalid, payload_invalid, headers_invalid = _request(
-            port,
-            "GET",
-            f"/pdf/{quote(pdf_name, safe='')}",
-            headers={"Range": "bytes=9999-10000"},
-        )
-        assert status_invalid == 416
-        assert payload_invalid == b""
-        assert headers_invalid.get("content-range", "") == f"bytes */{len(content)}"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_render_invalid_path_returns_not_found(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        status, payload, _ = _request(port, "GET", "/render/not-a-valid-path")
-        body = json.loads(payload.decode("utf-8"))
-        assert status == 404
-        assert body["error"] == "NOT_FOUND"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
-
-
-def test_scan_queue_full_returns_retry_after_header(tmp_path: Path) -> None:
-    db_path = tmp_path / "data.sqlite"
-    cfg = _make_config(tmp_path, db_path)
-    server = create_server(cfg)
-    thread, port = _start_server(server)
-    try:
-        assert server._scan is not None
-
-        def _raise_rate_limited(path: str = "") -> dict[str, object]:
-            raise RateLimitError("Scan queue is full, please retry later", retry_after=3)
-
-        server._scan.submit_scan = _raise_rate_limited  # type: ignore[method-assign]
-
-        status, payload, headers = _request(port, "POST", "/api/scan")
-        body = json.loads(payload.decode("utf-8"))
-        assert status == 429
-        assert body["error"] == "RATE_LIMITED"
-        assert headers.get("retry-after") == "3"
-    finally:
-        server.stop()
-        thread.join(timeout=3.0)
+    pdf_path.write_bytes(_RANGE_MULTI_PDF)
+
+    status_suffix, payload_suffix, headers_suffix = http_request(
+        port,
+        "GET",
+        f"/pdf/{quote(pdf_name, safe='')}",
+        headers={"Range": "bytes=-4"},
+    )
+    assert status_suffix == 206
+    assert payload_suffix == _RANGE_MULTI_PDF[-4:]
+    assert headers_suffix.get("content-range", "").endswith(f"/{len(_RANGE_MULTI_PDF)}")
+
+    status_open, payload_open, headers_open = http_request(
+        port,
+        "GET",
+        f"/pdf/{quote(pdf_name, safe='')}",
+        headers={"Range": "bytes=5-"},
+    )
+    assert status_open == 206
+    assert payload_open == _RANGE_MULTI_PDF[5:]
+    assert headers_open.get("content-range", "").startswith(f"bytes 5-{len(_RANGE_MULTI_PDF)-1}/")
+
+    status_invalid, payload_invalid, headers_invalid = http_request(
+        port,
+        "GET",
+        f"/pdf/{quote(pdf_name, safe='')}",
+        headers={"Range": "bytes=9999-10000"},
+    )
+    assert status_invalid == 416
+    assert payload_invalid == b""
+    assert headers_invalid.get("content-range", "") == f"bytes */{len(_RANGE_MULTI_PDF)}"
+
+
+def test_render_invalid_path_returns_not_found(live_server) -> None:
+    _server, port, _cfg = live_server
+    status, payload, _ = http_request(port, "GET", "/render/not-a-valid-path")
+    body = loads(payload)
+    assert status == 404
+    assert body["error"] == "NOT_FOUND"
+
+
+def test_scan_queue_full_returns_retry_after_header(live_server, monkeypatch: pytest.MonkeyPatch) -> None:
+    server, port, _cfg = live_server
+    assert server._scan is not None
+
+    def _raise_rate_limited(path: str = "") -> dict[str, object]:
+        raise RateLimitError("Scan queue is full, please retry later", retry_after=3)
+
+    # 服务器在模块内共享，替换必须在用例结束时还原
+    monkeypatch.setattr(server._scan, "submit_scan", _raise_rate_limited)
+
+    status, payload, headers = http_request(port, "POST", "/api/scan")
+    body = loads(payload)
+    assert status == 429
+    assert body["error"] == "RATE_LIMITED"
+    assert headers.get("retry-after") == "3"
@@ -25,24 +25,35 @@ from ipc_query.exceptions import (
 )
 
 
+class _StubRenderService:
+    """只提供 _find_pdf 的渲染服务替身；handle_pdf 只经它定位文件，不需要 MagicMock 的调用记录"""
+
+    def __init__(self, pdf_path: Path) -> None:
+        self._pdf_path = pdf_path
+
+    def _find_pdf(self, pdf_name: str) -> Path:
+        return self._pdf_path
+
+
 def _make_handlers(
     pdf_path: Path,
     search_service: MagicMock | None = None,
     db: MagicMock | None = None,
     config: Config | None = None,
     *,
+    render_service: MagicMock | None = None,
     import_enabled: bool | None = None,
     scan_enabled: bool | None = None,
     import_reason: str = "",
     scan_reason: str = "",
 ) -> ApiHandlers:
-    render_service = MagicMock()
-    render_service._find_pdf.return_value = pdf_path
+    # 只有用例显式传入或需要逐项配置返回值的依赖才用 MagicMock；
+    # 搜索与数据库仅在传入它们的用例中被调用，其余用例给 None
     return ApiHandlers(
-        search_service=search_service or MagicMock(),
-        render_service=render_service,
+        search_service=search_service,  # type: ignore[arg-type]
+        render_service=render_service or _StubRenderService(pdf_path),  # type: ignore[arg-type]
         doc_repo=MagicMock(),
-        db=db or MagicMock(),
+        db=db,  # type: ignore[arg-type]
         config=config or Config(),
         import_enabled=import_enabled,
         scan_enabled=scan_enabled,
@@ -613,7 +624,7 @@ def test_handle_docs_tree_rejects_nested_path_under_single_level_policy(tmp_path
 def test_handle_render_propagates_scale(tmp_path: Path) -> None:
     pdf_path = tmp_path / "sample.pdf"
     pdf_path.write_bytes(b"%PDF-1.4\n%%EOF\n")
-    handlers = _make_handlers(pdf_path)
+    handlers = _make_handlers(pdf_path, render_service=MagicMock())
     handlers._render.render_page.return_value = tmp_path / "render.png"
 
     status, body, ct = handlers.handle_render("sample.pdf", "1.png", "1.5")
@@ -138,3 +138,25 @@ def test_render_semaphore_takes_precedence_over_render_workers(monkeypatch: pyte
     config = Config.from_env()
     assert config.render_semaphore == 3
     assert config.render_workers == 3
+
+
+def test_ensure_directories_skips_already_created_dirs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    config = Config(
+        pdf_dir=tmp_path / "pdfs",
+        upload_dir=tmp_path / "pdfs",
+        cache_dir=tmp_path / "cache",
+    )
+    config.ensure_directories()
+    assert (tmp_path / "pdfs").is_dir()
+    assert (tmp_path / "cache").is_dir()
+
+    calls: list[Path] = []
+    original_mkdir = Path.mkdir
+
+    def _counting_mkdir(self: Path, *args: object, **kwargs: object) -> None:
+        calls.append(self)
+        original_mkdir(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "mkdir", _counting_mkdir)
+    config.ensure_directories()
+    assert calls == []
@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import queue
 import sqlite3
+import threading
 import time
 from pathlib import Path
 
@@ -98,6 +99,48 @@ def test_upload_dir_is_staging_and_pdf_dir_is_final(
         service.stop()
 
 
+def test_get_job_wait_returns_when_job_finishes(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    release = threading.Event()
+
+    def _blocking_ingest(_conn: object, _pdf_paths: list[Path]) -> dict[str, int]:
+        release.wait(timeout=5.0)
+        return {
+            "docs_ingested": 1,
+            "docs_replaced": 0,
+            "parts_ingested": 0,
+            "xrefs_ingested": 0,
+            "aliases_ingested": 0,
+        }
+
+    monkeypatch.setattr(importer_module, "ingest_pdfs", _blocking_ingest)
+
+    service = ImportService(
+        db_path=tmp_path / "db.sqlite",
+        pdf_dir=tmp_path / "pdfs",
+        upload_dir=tmp_path / "uploads",
+    )
+
+    try:
+        job_id = str(service.submit_upload("wait.pdf", _PDF_PAYLOAD, "application/pdf")["job_id"])
+
+        pending = service.get_job(job_id, wait_s=0.05)
+        assert pending is not None
+        assert pending["status"] in {"queued", "running"}
+
+        threading.Timer(0.05, release.set).start()
+        started = time.time()
+        finished = service.get_job(job_id, wait_s=5.0)
+        assert finished is not None
+        assert finished["status"] == "success"
+        assert time.time() - started < 2.0
+    finally:
+        release.set()
+        service.stop()
+
+
 def test_finished_jobs_are_pruned_by_limit(
     tmp_path: Path,
     monkeypatch: pytest.MonkeyPatch,
@@ -0,0 +1,120 @@
+"""
+logger 模块测试
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import threading
+
+from ipc_query.utils.logger import JSONFormatter, LogContext, TextFormatter, get_logger
+
+
+def _capture(name: str) -> tuple[logging.Logger, io.StringIO]:
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JSONFormatter())
+    base = logging.getLogger(name)
+    base.handlers.clear()
+    base.addHandler(handler)
+    base.setLevel(logging.INFO)
+    base.propagate = False
+    return base, stream
+
+
+def _records(stream: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in stream.getvalue().splitlines() if line]
+
+
+def test_log_context_adds_and_restores_fields() -> None:
+    _, stream = _capture("test.logger.ctx")
+    log = get_logger("test.logger.ctx", {"svc": "ipc"})
+
+    with LogContext(log, request_id="r1"):
+        log.info("inside")
+        with LogContext(log, request_id="r2", job="j"):
+            log.info("nested")
+        log.info("after nested")
+    log.info("outside")
+
+    inside, nested, after_nested, outside = _records(stream)
+    assert inside["request_id"] == "r1" and inside["svc"] == "ipc"
+    assert nested["request_id"] == "r2" and nested["job"] == "j"
+    assert after_nested["request_id"] == "r1" and "job" not in after_nested
+    assert "request_id" not in outside and outside["svc"] == "ipc"
+    assert log.extra == {"svc": "ipc"}
+
+
+def test_log_context_only_applies_to_given_adapter() -> None:
+    _, stream = _capture("test.logger.scope")
+    log = get_logger("test.logger.scope")
+    other = get_logger("test.logger.scope")
+
+    with LogContext(log, request_id="r1"):
+        log.info("scoped")
+        other.info("unscoped")
+
+    scoped, unscoped = _records(stream)
+    assert scoped["request_id"] == "r1"
+    assert "request_id" not in unscoped
+
+
+def test_log_context_is_isolated_between_threads() -> None:
+    _, stream = _capture("test.logger.threads")
+    log = get_logger("test.logger.threads")
+    entered = threading.Event()
+    release = threading.Event()
+
+    def worker() -> None:
+        with LogContext(log, request_id="worker"):
+            entered.set()
+            release.wait(timeout=5.0)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert entered.wait(timeout=5.0)
+    log.info("main thread")
+    release.set()
+    thread.join(timeout=5.0)
+
+    (record,) = _records(stream)
+    assert "request_id" not in record
+
+
+def test_json_formatter_keeps_non_ascii_and_extra_fields() -> None:
+    _, stream = _capture("test.logger.json")
+    log = get_logger("test.logger.json")
+    log.info("导入完成", extra_fields={"pdf": "手册.pdf", 1: "non-str key"})
+
+    line = stream.getvalue().strip()
+    assert "导入完成" in line
+    record = json.loads(line)
+    assert record["message"] == "导入完成"
+    assert record["pdf"] == "手册.pdf"
+    assert record["1"] == "non-str key"
+
+
+def test_text_formatter_uses_record_time_in_utc() -> None:
+    formatter = TextFormatter()
+    record = logging.LogRecord("test.logger.text", logging.INFO, __file__, 1, "hello", None, None)
+    record.created = 0.5
+    assert formatter.format(record) == "[1970-01-01 00:00:00] [INFO ] [test.logger.text] hello"
+
+    record.created = 86400.0
+    assert formatter.format(record).startswith("[1970-01-02 00:00:00]")
+
+
+def test_adapter_process_fast_path_and_caller_dict_untouched() -> None:
+    log = get_logger("test.logger.process")
+    kwargs: dict = {"exc_info": False}
+    msg, out = log.process("plain", kwargs)
+    assert msg == "plain"
+    assert out is kwargs and out == {"exc_info": False}
+
+    caller_fields = {"pdf": "a.pdf"}
+    with LogContext(log, request_id="r1"):
+        _, out = log.process("ctx", {"extra_fields": caller_fields})
+    assert out["extra"]["extra_fields"] == {"pdf": "a.pdf", "request_id": "r1"}
+    assert caller_fields == {"pdf": "a.pdf"}
@@ -40,3 +40,42 @@ def test_metrics_export_and_reset() -> None:
     after_reset = m.export()
     assert after_reset["histograms"]["search_latency_ms"]["count"] == 0
     assert after_reset["histograms"]["render_latency_ms"]["count"] == 0
+
+
+def test_metrics_getters_do_not_create_missing_entries() -> None:
+    m = Metrics()
+    assert m.counter_get("missing_counter") == 0
+    assert m.gauge_get("missing_gauge") == 0.0
+    assert m.histogram_get_stats("missing_hist")["count"] == 0
+
+    exported = m.export()
+    assert exported["counters"] == {}
+    assert exported["gauges"] == {}
+    assert exported["histograms"] == {}
+
+
+def test_histogram_incremental_stats_match_full_scan() -> None:
+    import random
+
+    rng = random.Random(7)
+    hist = Histogram()
+    observed: list[float] = []
+    for _ in range(METRICS_HISTOGRAM_WINDOW * 2 + 123):
+        value = float(rng.randint(0, 1000))
+        hist.observe(value)
+        observed.append(value)
+
+    window = sorted(observed[-METRICS_HISTOGRAM_WINDOW:])
+    count = len(window)
+    stats = hist.get_stats()
+    assert stats["count"] == count
+    assert stats["sum"] == sum(window)
+    assert stats["min"] == window[0]
+    assert stats["max"] == window[-1]
+    assert stats["p99"] == window[min(int(count * 0.99), count - 1)]
+
+    hist.reset()
+    assert hist.get_stats()["count"] == 0
+    hist.observe(2.5)
+    stats = hist.get_stats()
+    assert stats["min"] == stats["max"] == stats["p99"] == 2.5